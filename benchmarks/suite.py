@@ -0,0 +1,279 @@
+"""Benchmark planterbox's parsing, matching, collection and execution.
+
+Usage:
+  python benchmarks/suite.py [--output results.json] [size options]
+  python benchmarks/suite.py --compare baseline.json results.json
+
+Generates a synthetic package of features (see synthetic.py) in a temporary
+directory and times, taking the best of --repeat runs:
+
+- parse: parse_feature on every feature's text
+- init: FeatureTestCase.__init__ and check_scenarios for every feature, with
+  steps and hooks harvested afresh
+- match_step: matching every step of every scenario
+- linear_match: matching every step by trying each step pattern in turn,
+  the way planterbox did before StepDispatcher, to compare with match_step
+- dispatcher: building the StepDispatcher of the package's steps
+- run_hooks: the before and after step hooks, once per step
+- substitute_steps: substituting every example into its outline
+- normalize_names: normalizing a test name for every scenario
+- nose2: a whole nose2 run of the package, in a subprocess
+
+Results are written as JSON, along with the sizes used and the planterbox
+version and git commit, so runs from different commits can be compared with
+--compare.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from mock import Mock  # noqa: E402
+from nose2.util import transplant_class  # noqa: E402
+
+import planterbox  # noqa: E402
+from planterbox.dispatch import (  # noqa: E402
+    step_arguments,
+    StepDispatcher,
+)
+from planterbox.exceptions import UnmatchedStepException  # noqa: E402
+from planterbox.feature import (  # noqa: E402
+    FeatureTestCase,
+    run_hooks,
+    substitute_steps,
+)
+from planterbox.parsing import parse_feature  # noqa: E402
+from planterbox.plugin import normalize_names  # noqa: E402
+from planterbox.registry import invalidate  # noqa: E402
+import synthetic  # noqa: E402
+
+NOSE2_CONFIG = '''[unittest]
+plugins = planterbox
+
+[planterbox]
+always-on = True
+'''
+
+
+def linear_match(step_inventory, step):
+    """The original FeatureTestCase.match_step algorithm."""
+    for step_fn in step_inventory:
+        for pattern in step_fn.planterbox_patterns:
+            step_match = pattern.match(step)
+            if step_match is not None:
+                return step_fn, step_arguments(step_match)
+    raise UnmatchedStepException(step)
+
+
+class Benchmarks(object):
+    """The benchmarks, run against a generated package"""
+
+    def __init__(self, directory, package, feature_paths):
+        self.directory = directory
+        self.package = package
+        self.feature_paths = feature_paths
+        self.feature_texts = []
+        for feature_path in feature_paths:
+            with io.open(feature_path, encoding='utf-8') as feature_file:
+                self.feature_texts.append(feature_file.read())
+
+        sys.path.insert(0, directory)
+        self.module = __import__(package)
+        self.test_case_class = transplant_class(FeatureTestCase, package)
+        self.test_cases = self.make_test_cases()
+        self.steps = [
+            step
+            for test_case in self.test_cases
+            for scenario in test_case.scenarios
+            for step in substitute_steps(
+                scenario.step_texts,
+                next(test_case.load_examples(scenario.examples), {}),
+            )
+        ]
+
+    def make_test_cases(self):
+        invalidate(self.module)
+        test_cases = []
+        for feature_path in self.feature_paths:
+            test_case = self.test_case_class(feature_path=feature_path)
+            test_case.check_scenarios()
+            test_cases.append(test_case)
+        return test_cases
+
+    def bench_parse(self):
+        for feature_text in self.feature_texts:
+            parse_feature(feature_text)
+
+    def bench_init(self):
+        self.make_test_cases()
+
+    def bench_match_step(self):
+        match_step = self.test_cases[0].match_step
+        for step in self.steps:
+            match_step(step)
+
+    def bench_linear_match(self):
+        inventory = self.test_cases[0].step_registry.steps
+        for step in self.steps:
+            linear_match(inventory, step)
+
+    def bench_dispatcher(self):
+        StepDispatcher(self.test_cases[0].step_registry.steps)
+
+    def bench_run_hooks(self):
+        tester = self.test_cases[0]
+        result = Mock()
+        for step in self.steps:
+            run_hooks(self.module, tester, result, 'before', 'step')
+            run_hooks(self.module, tester, result, 'after', 'step')
+
+    def bench_substitute_steps(self):
+        for test_case in self.test_cases:
+            for scenario in test_case.scenarios:
+                if not scenario.examples:
+                    continue
+                for example in test_case.load_examples(scenario.examples):
+                    substitute_steps(scenario.step_texts, example)
+
+    def bench_normalize_names(self):
+        normalize_names([
+            '{}:{}:{}'.format(
+                self.package, os.path.basename(feature_path), index,
+            )
+            for feature_path, test_case in zip(
+                self.feature_paths, self.test_cases,
+            )
+            for index in range(len(test_case.scenarios))
+        ])
+
+    def bench_nose2(self):
+        config_path = os.path.join(self.directory, 'unittest.cfg')
+        with open(config_path, 'w') as config_file:
+            config_file.write(NOSE2_CONFIG)
+        subprocess.check_call(
+            [sys.executable, '-m', 'nose2', '-c', config_path,
+             '-s', self.directory, '-t', self.directory, self.package],
+            stdout=open(os.devnull, 'w'),
+            stderr=subprocess.STDOUT,
+            env=dict(
+                os.environ,
+                PYTHONPATH=os.pathsep.join(
+                    [os.path.dirname(HERE), self.directory]
+                    + os.environ.get('PYTHONPATH', '').split(os.pathsep)
+                ),
+            ),
+        )
+
+    def names(self, skip=()):
+        return [
+            name[len('bench_'):] for name in sorted(dir(self))
+            if name.startswith('bench_') and name[len('bench_'):] not in skip
+        ]
+
+    def run(self, name, repeat):
+        """Time a benchmark, returning the best and mean of repeat runs"""
+        times = timeit.repeat(
+            getattr(self, 'bench_' + name), number=1, repeat=repeat,
+        )
+        return {
+            'best': min(times),
+            'mean': sum(times) / len(times),
+            'repeat': repeat,
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=HERE,
+            stderr=open(os.devnull, 'w'),
+        ).decode('ascii').strip()
+    except Exception:
+        return None
+
+
+def compare(baseline_path, results_path):
+    """Print the change in each benchmark's best time between two runs"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(results_path) as results_file:
+        results = json.load(results_file)
+
+    if baseline['sizes'] != results['sizes']:
+        print('Warning: results were generated with different sizes')
+    for name in sorted(results['results']):
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['best']
+        after = results['results'][name]['best']
+        print('{:<18} {:10.4f}s -> {:10.4f}s  {:+7.1%}'.format(
+            name, before, after, (after - before) / before if before else 0,
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    synthetic.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results as JSON to a file')
+    parser.add_argument('--only', action='append',
+                        help='Run just the named benchmark; repeatable')
+    parser.add_argument('--skip-nose2', action='store_true')
+    parser.add_argument('--compare', nargs=2,
+                        metavar=('BASELINE', 'RESULTS'),
+                        help='Compare two results files and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sizes = synthetic.size_options(args)
+    directory = tempfile.mkdtemp()
+    try:
+        package = 'bench_features'
+        feature_paths = synthetic.generate(directory, package, **sizes)
+        benchmarks = Benchmarks(directory, package, feature_paths)
+
+        names = args.only or benchmarks.names(
+            skip=('nose2',) if args.skip_nose2 else (),
+        )
+        results = {}
+        for name in names:
+            results[name] = benchmarks.run(name, args.repeat)
+            print('{:<18} {:10.4f}s'.format(name, results[name]['best']))
+    finally:
+        shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(
+                {
+                    'planterbox': planterbox.__version__,
+                    'commit': git_commit(),
+                    'python': platform.python_version(),
+                    'sizes': sizes,
+                    'results': results,
+                },
+                output,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Generate synthetic planterbox step packages and features for benchmarks.
+
+Usage: python benchmarks/synthetic.py DIRECTORY [options]
+
+Writes a package, ``bench_features`` by default, to DIRECTORY: an
+``__init__.py`` defining step patterns and hooks, and feature files using
+them. Every other scenario is an outline, and every scenario has a step with
+a multiline payload.
+"""
+
+import argparse
+import os
+import random
+
+VERBS = ['add', 'remove', 'check', 'create', 'delete', 'open', 'close',
+         'visit', 'submit', 'select', 'enter', 'verify', 'wait', 'load']
+SUBJECTS = ['I', 'the', 'a', 'user', 'admin', 'page', 'form', 'system']
+KEYWORDS = ['Given', 'When', 'Then', 'And', 'But']
+
+DEFAULTS = {
+    'features': 20,
+    'scenarios': 10,
+    'rows': 10,
+    'patterns': 200,
+    'steps': 6,
+    'payload_lines': 5,
+}
+
+PACKAGE_HEADER = '''from planterbox import (
+    hook,
+    step,
+)
+
+
+@step(r'I store the following payload:', multiline='payload')
+def store_payload(test, payload):
+    test.payload = payload
+
+
+@hook('before', 'scenario')
+def before_scenario(test):
+    test.values = []
+
+
+@hook('before', 'step')
+def before_step(test):
+    pass
+
+
+@hook('after', 'step')
+def after_step(test):
+    pass
+'''
+
+STEP_TEMPLATE = '''
+
+@step(r'{subject} {verb} item{index} with (\\d+) and "([^"]*)"')
+def step_{index}(test, number, text):
+    test.values.append(number)
+'''
+
+
+def step_text(index, number, text):
+    """The text of a step matching the step pattern with index"""
+    return '{} {} item{} with {} and "{}"'.format(
+        SUBJECTS[index % len(SUBJECTS)],
+        VERBS[index % len(VERBS)],
+        index,
+        number,
+        text,
+    )
+
+
+def package_source(patterns):
+    """The __init__.py of a package with patterns numbered steps"""
+    return PACKAGE_HEADER + ''.join(
+        STEP_TEMPLATE.format(
+            subject=SUBJECTS[index % len(SUBJECTS)],
+            verb=VERBS[index % len(VERBS)],
+            index=index,
+        )
+        for index in range(patterns)
+    )
+
+
+def feature_source(feature_index, scenarios, rows, patterns, steps,
+                   payload_lines, seed=0):
+    """The text of a feature; odd-numbered scenarios are outlines"""
+    rng = random.Random('{}-{}'.format(seed, feature_index))
+    lines = [
+        'Feature: Synthetic feature {}'.format(feature_index),
+        '    A generated feature for benchmarking planterbox.',
+        '',
+    ]
+    for scenario_index in range(scenarios):
+        outline = scenario_index % 2 == 1
+        lines.append('    Scenario{}: Synthetic scenario {}'.format(
+            ' Outline' if outline else '', scenario_index,
+        ))
+        lines.append('        Scenario Tag: tag{}'.format(scenario_index % 3))
+        lines.append('        Given I store the following payload:')
+        lines.append('            """')
+        lines.extend(
+            '            payload line {}'.format(payload_line)
+            for payload_line in range(payload_lines)
+        )
+        lines.append('            """')
+        for step_index in range(steps):
+            lines.append('        {} {}'.format(
+                rng.choice(KEYWORDS),
+                step_text(
+                    rng.randrange(patterns),
+                    '<number>' if outline else rng.randrange(1000),
+                    '<text>' if outline else 'value',
+                ),
+            ))
+        if outline:
+            lines.append('        Examples:')
+            lines.append('            number | text')
+            lines.extend(
+                '            {} | row {}'.format(rng.randrange(1000), row)
+                for row in range(rows)
+            )
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate(directory, package='bench_features', features=20, scenarios=10,
+             rows=10, patterns=200, steps=6, payload_lines=5, seed=0):
+    """Write a synthetic package of features to directory
+
+    Returns the paths of the feature files written.
+    """
+    package_dir = os.path.join(directory, package)
+    if not os.path.isdir(package_dir):
+        os.makedirs(package_dir)
+    with open(os.path.join(package_dir, '__init__.py'), 'w') as init:
+        init.write(package_source(patterns))
+
+    feature_paths = []
+    for feature_index in range(features):
+        feature_path = os.path.join(
+            package_dir, 'synthetic_{}.feature'.format(feature_index),
+        )
+        with open(feature_path, 'w') as feature_file:
+            feature_file.write(feature_source(
+                feature_index, scenarios, rows, patterns, steps,
+                payload_lines, seed,
+            ))
+        feature_paths.append(feature_path)
+    return feature_paths
+
+
+def add_arguments(parser):
+    """Add the options controlling the size of the generated package"""
+    parser.add_argument('--features', type=int, default=DEFAULTS['features'])
+    parser.add_argument('--scenarios', type=int,
+                        default=DEFAULTS['scenarios'],
+                        help='Scenarios per feature')
+    parser.add_argument('--rows', type=int, default=DEFAULTS['rows'],
+                        help='Examples per scenario outline')
+    parser.add_argument('--patterns', type=int, default=DEFAULTS['patterns'],
+                        help='Step patterns in the package')
+    parser.add_argument('--steps', type=int, default=DEFAULTS['steps'],
+                        help='Steps per scenario, besides the payload step')
+    parser.add_argument('--payload-lines', type=int,
+                        default=DEFAULTS['payload_lines'],
+                        help='Lines in each multiline payload')
+
+
+def size_options(args):
+    """The generate() keyword arguments from parsed add_arguments options"""
+    return {name: getattr(args, name) for name in DEFAULTS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('directory')
+    parser.add_argument('--package', default='bench_features')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    paths = generate(args.directory, package=args.package,
+                     **size_options(args))
+    print('Wrote {} features to {}'.format(
+        len(paths), os.path.join(args.directory, args.package),
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,12 @@
+__version__ = '0.8.0'
+
 from .plugin import (
     Planterbox,
 )
 from .decorators import (
+    fixture,
     hook,
     step,
 )
 
-__all__ = [Planterbox, hook, step]
+__all__ = [Planterbox, fixture, hook, step]
@@ -0,0 +1,48 @@
+"""Maintenance commands for planterbox: python -m planterbox COMMAND"""
+
+import argparse
+import os
+
+from .cache import (
+    clear_cache,
+    DEFAULT_CACHE_DIR,
+)
+from .manifest import (
+    Manifest,
+    MANIFEST_FILE,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m planterbox')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    clear_cache_parser = commands.add_parser(
+        'clear-cache', help='Remove the planterbox cache directory.',
+    )
+    clear_cache_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+
+    manifest_parser = commands.add_parser(
+        'manifest',
+        help='Build or update the manifest of the features in a directory.',
+    )
+    manifest_parser.add_argument('directory', nargs='?', default='.')
+    manifest_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == 'clear-cache':
+        clear_cache(os.path.abspath(args.cache_dir))
+    elif args.command == 'manifest':
+        manifest = Manifest(
+            os.path.join(os.path.abspath(args.cache_dir), MANIFEST_FILE),
+        )
+        parsed = manifest.build(args.directory)
+        manifest.save()
+        print('{} features in {} ({} parsed)'.format(
+            len(manifest.features), manifest.path, parsed,
+        ))
+
+
+if __name__ == '__main__':
+    main()
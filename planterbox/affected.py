@@ -0,0 +1,229 @@
+"""Selecting the scenarios affected by changes since they last passed.
+
+With ``--planterbox-affected``, every selected scenario is fingerprinted: a
+hash of its text, tags and steps, the bytecode and patterns of every step
+function it's bound to, and the bytecode of every hook in its package. Only
+scenarios whose fingerprint differs from the one recorded when they last
+passed are run. Scenarios that have never passed, including those that
+failed last time, always run.
+
+Examples aren't read to fingerprint a scenario outline: the rows of its
+table, or the contents of its examples file, are hashed as they are. Since a
+step with placeholders can bind to a different step function for each
+example, an outline with one is bound to every step function of its
+package.
+
+Fingerprints of passing scenarios are kept in ``fingerprints.json`` in the
+cache directory, by scenario id (``package:file.feature:index``).
+
+Only the code of step and hook functions themselves is fingerprinted, not the
+helpers they call or the values they close over: after changing those, run
+the whole suite.
+"""
+
+import hashlib
+import inspect
+import logging
+from types import (
+    CodeType,
+)
+
+from .cache import (
+    load_state,
+    save_state,
+)
+from .exceptions import (
+    UnmatchedStepException,
+)
+from .lastfailed import (
+    split_scenario_id,
+)
+
+log = logging.getLogger('planterbox')
+
+STATE_FILE = 'fingerprints.json'
+STATE_FORMAT = 1
+
+
+def update_code(digest, code):
+    """Add a code object, and any code objects nested in it, to digest"""
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            update_code(digest, const)
+        elif isinstance(const, frozenset):
+            # Set order varies with hash randomization
+            digest.update(repr(sorted(const, key=repr)).encode('utf-8'))
+        else:
+            digest.update(repr(const).encode('utf-8'))
+    digest.update(' '.join(code.co_names).encode('utf-8'))
+    digest.update(' '.join(code.co_varnames).encode('utf-8'))
+
+
+def function_fingerprint(fn):
+    """Hash a step or hook function's bytecode, defaults and step patterns
+
+    Callables without bytecode, like builtins or partials, are hashed by
+    their source if it can be found, or their repr.
+    """
+    digest = hashlib.sha1()
+    while hasattr(fn, '__wrapped__'):
+        fn = fn.__wrapped__
+    code = getattr(fn, '__code__', None)
+    if code is not None:
+        update_code(digest, code)
+        digest.update(repr(getattr(fn, '__defaults__', None)).encode('utf-8'))
+    else:
+        try:
+            source = inspect.getsource(fn)
+        except (IOError, OSError, TypeError):
+            source = repr(fn)
+        digest.update(source.encode('utf-8'))
+    for pattern in getattr(fn, 'planterbox_patterns', ()):
+        digest.update(pattern.pattern.encode('utf-8'))
+    digest.update(repr(getattr(fn, 'planterbox_batch', None)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def examples_fingerprint(test, examples):
+    """Hash the source of an outline's examples: the rows of its table, or
+    the name and contents of its examples file"""
+    digest = hashlib.sha1()
+    if examples.file is not None:
+        digest.update(examples.file.encode('utf-8'))
+        with open(test.examples_path(examples.file), 'rb') as examples_file:
+            digest.update(examples_file.read())
+    else:
+        digest.update('\n'.join(examples.rows).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Fingerprints(object):
+    """The fingerprints of scenarios when they last passed, loaded from and
+    saved to path, and the fingerprints of scenarios in this run"""
+
+    def __init__(self, path):
+        self.path = path
+        self.passed = self.load()
+        self.current = {}
+        self._functions = {}
+        self._steps = {}
+
+    def load(self):
+        state = load_state(self.path, STATE_FORMAT) or {}
+        return state.get('scenarios', {})
+
+    def save(self):
+        save_state(
+            self.path, STATE_FORMAT, {'scenarios': self.passed},
+            'scenario fingerprints',
+        )
+
+    def function_fingerprint(self, fn):
+        if fn not in self._functions:
+            self._functions[fn] = function_fingerprint(fn)
+        return self._functions[fn]
+
+    def hooks_fingerprint(self, step_registry):
+        """Hash every hook of a package, with the stages they run at"""
+        digest = hashlib.sha1()
+        for timing_stage in sorted(step_registry.hooks):
+            digest.update(' '.join(timing_stage).encode('utf-8'))
+            for hook in step_registry.hooks[timing_stage]:
+                digest.update(self.function_fingerprint(hook).encode('ascii'))
+        return digest.hexdigest()
+
+    def steps_fingerprint(self, step_registry):
+        """Hash every step function of a package"""
+        if step_registry not in self._steps:
+            digest = hashlib.sha1()
+            for step_fn in step_registry.steps:
+                digest.update(
+                    self.function_fingerprint(step_fn).encode('ascii'),
+                )
+            self._steps[step_registry] = digest.hexdigest()
+        return self._steps[step_registry]
+
+    def scenario_fingerprint(self, test, scenario, hooks_fingerprint):
+        """Hash a scenario of a FeatureTestCase with the steps it's bound to
+
+        An outline is hashed with the source of its examples, and if it has
+        a step with placeholders, with every step function of its package.
+        """
+        digest = hashlib.sha1()
+        digest.update(hooks_fingerprint.encode('ascii'))
+        digest.update(scenario.text.encode('utf-8'))
+        digest.update(' '.join(sorted(scenario.tags)).encode('utf-8'))
+
+        step_texts = scenario.step_texts
+        digest.update('\n'.join(step_texts).encode('utf-8'))
+        if scenario.examples:
+            digest.update(
+                examples_fingerprint(test, scenario.examples).encode('ascii'),
+            )
+            from .feature import OutlineTemplate
+            if any(OutlineTemplate(step_texts).placeholders):
+                digest.update(
+                    self.steps_fingerprint(test.step_registry).encode('ascii'),
+                )
+                return digest.hexdigest()
+
+        bound = set()
+        for step in step_texts:
+            try:
+                step_fn, step_arguments = test.match_step(step)
+            except UnmatchedStepException:
+                continue
+            if step_fn not in bound:
+                bound.add(step_fn)
+                digest.update(
+                    self.function_fingerprint(step_fn).encode('ascii'),
+                )
+        return digest.hexdigest()
+
+    def affected_scenarios(self, test):
+        """Fingerprint the selected scenarios of a FeatureTestCase, returning
+        the indexes of those that changed since they last passed"""
+        feature_id = test.feature_id()
+        hooks_fingerprint = self.hooks_fingerprint(test.step_registry)
+        affected = set()
+        for scenario in test.selected_scenarios():
+            scenario_id = '{}:{}'.format(feature_id, scenario.index)
+            try:
+                fingerprint = self.scenario_fingerprint(
+                    test, scenario, hooks_fingerprint,
+                )
+            except Exception:
+                log.debug('Could not fingerprint %s', scenario_id,
+                          exc_info=True)
+                affected.add(scenario.index)
+                continue
+            self.current[scenario_id] = fingerprint
+            if self.passed.get(scenario_id) != fingerprint:
+                affected.add(scenario.index)
+        return affected
+
+    def update(self, ran, failed):
+        """Record the fingerprints of the scenarios in ran that didn't fail,
+        and forget those of the scenarios in failed"""
+        failed_features = set()
+        for scenario_id in failed:
+            feature_id, index = split_scenario_id(scenario_id)
+            if index is None:
+                failed_features.add(feature_id)
+            self.passed.pop(scenario_id, None)
+
+        for scenario_id in ran:
+            if scenario_id in failed:
+                continue
+            if split_scenario_id(scenario_id)[0] in failed_features:
+                continue
+            if scenario_id in self.current:
+                self.passed[scenario_id] = self.current[scenario_id]
+
+        if failed_features:
+            self.passed = {
+                scenario_id: fingerprint
+                for scenario_id, fingerprint in self.passed.items()
+                if split_scenario_id(scenario_id)[0] not in failed_features
+            }
@@ -0,0 +1,77 @@
+"""Running ``async def`` steps and hooks.
+
+Steps and hooks may be coroutine functions. Whatever they return that is
+awaitable is run to completion on an event loop that belongs to the calling
+thread and lives until the end of the test run, so connection pools, sessions
+and other loop-bound resources survive from one step and scenario to the
+next. It's also the thread's current event loop, so synchronous steps that
+call ``asyncio.get_event_loop()`` get the same one. Threads running scenarios
+concurrently each get their own loop, which is closed when the feature's
+scenarios are done.
+"""
+
+import atexit
+import inspect
+import threading
+
+try:
+    import asyncio
+except ImportError:  # Python 2
+    asyncio = None
+
+_local = threading.local()
+_loops = {}
+_loops_lock = threading.Lock()
+
+
+def event_loop():
+    """Find the event loop for the calling thread, creating it on first use"""
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop = loop
+        with _loops_lock:
+            _loops[threading.current_thread().ident] = loop
+    return loop
+
+
+def run_awaitable(value):
+    """Run value to completion on this thread's event loop if it's awaitable,
+    returning its result; return anything else unchanged"""
+    if asyncio is None or not inspect.isawaitable(value):
+        return value
+    return event_loop().run_until_complete(value)
+
+
+def close_event_loop(thread_ident=None):
+    """Close the event loop of a thread, by default the calling thread
+
+    The thread's loop must not be running; a thread that has finished is fine.
+    """
+    if thread_ident is None:
+        thread_ident = threading.current_thread().ident
+    with _loops_lock:
+        loop = _loops.pop(thread_ident, None)
+    if loop is None or loop.is_closed():
+        return
+    try:
+        if hasattr(loop, 'shutdown_asyncgens'):  # Python 3.6+
+            loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+def close_event_loops():
+    """Close every event loop that isn't running"""
+    with _loops_lock:
+        thread_idents = [
+            thread_ident
+            for thread_ident, loop in _loops.items()
+            if not loop.is_running()
+        ]
+    for thread_ident in thread_idents:
+        close_event_loop(thread_ident)
+
+
+atexit.register(close_event_loops)
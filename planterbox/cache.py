@@ -0,0 +1,181 @@
+"""On-disk caches kept between planterbox runs.
+
+Everything lives in one cache directory, ``.planterbox_cache`` in the working
+directory by default. Parsed features are kept under ``parse/``, one pickle
+per feature file, so they can be reused until the file or planterbox itself
+changes.
+
+Run ``python -m planterbox clear-cache`` to clear the cache directory.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+
+from . import (
+    __version__,
+)
+from .parsing import (
+    parse_feature,
+)
+
+try:
+    from os import replace as replace_file
+except ImportError:  # Python 2
+    replace_file = os.rename
+
+log = logging.getLogger('planterbox')
+
+DEFAULT_CACHE_DIR = '.planterbox_cache'
+# Bump whenever the structure of parsed features changes
+PARSE_CACHE_FORMAT = 2
+
+
+def cache_dir(config=None):
+    """Find the cache directory configured in a [planterbox] config section"""
+    directory = DEFAULT_CACHE_DIR
+    if config:
+        directory = config.as_str('cache-dir', DEFAULT_CACHE_DIR)
+    return os.path.abspath(directory)
+
+
+def clear_cache(directory):
+    """Remove a cache directory and everything in it"""
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def write_atomically(path, data):
+    """Write bytes to path so that concurrent readers never see partial data
+
+    The data is written to a temporary file in the same directory and then
+    renamed over path; if several processes write the same path at once, one
+    of them wins.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        replace_file(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def load_state(path, state_format):
+    """Read a JSON state file written by save_state, returning its contents,
+    or None if it's missing, unreadable or written in another format"""
+    try:
+        with open(path) as state_file:
+            state = json.load(state_file)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('format') != state_format:
+        return None
+    return state
+
+
+def save_state(path, state_format, state, description=None):
+    """Write state, a dict, to path as JSON marked with state_format
+
+    If description is given, failing to write is logged as a warning about
+    the description; otherwise it raises.
+    """
+    data = json.dumps(
+        dict(state, format=state_format),
+        indent=0,
+        sort_keys=True,
+    )
+    try:
+        write_atomically(path, data.encode('utf-8'))
+    except (IOError, OSError):
+        if description is None:
+            raise
+        log.warning('Could not write %s to %s', description, path,
+                    exc_info=True)
+
+
+def read_feature_text(data):
+    """Decode the bytes of a feature file with universal newlines"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+class ParseCache(object):
+    """Parsed features, keyed by file path and validated by content hash,
+    modification time and planterbox version.
+
+    Entries hold planterbox.nodes.Feature instances.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def entry_path(self, feature_path):
+        key = hashlib.sha1(
+            os.path.abspath(feature_path).encode('utf-8'),
+        ).hexdigest()
+        return os.path.join(self.directory, key + '.pickle')
+
+    def load_entry(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                entry = pickle.load(entry_file)
+        except Exception:
+            # Missing, unreadable or written by an incompatible version.
+            return None
+        if not isinstance(entry, dict) or (
+            entry.get('version'), entry.get('format'),
+        ) != (__version__, PARSE_CACHE_FORMAT):
+            return None
+        return entry
+
+    def parse(self, feature_path):
+        """Parse the feature at feature_path, reusing a cached parse if the
+        file hasn't changed"""
+        feature_stat = os.stat(feature_path)
+        entry_path = self.entry_path(feature_path)
+        entry = self.load_entry(entry_path)
+        if (
+            entry is not None
+            and entry['mtime'] == feature_stat.st_mtime
+            and entry['size'] == feature_stat.st_size
+        ):
+            return entry['parsed']
+
+        with io.open(feature_path, mode='rb') as feature_file:
+            data = feature_file.read()
+        digest = hashlib.sha1(data).hexdigest()
+
+        if entry is not None and entry['digest'] == digest:
+            parsed = entry['parsed']
+        else:
+            parsed = parse_feature(read_feature_text(data))
+
+        entry = {
+            'version': __version__,
+            'format': PARSE_CACHE_FORMAT,
+            'mtime': feature_stat.st_mtime,
+            'size': feature_stat.st_size,
+            'digest': digest,
+            'parsed': parsed,
+        }
+        try:
+            write_atomically(
+                entry_path,
+                pickle.dumps(entry, pickle.HIGHEST_PROTOCOL),
+            )
+        except (IOError, OSError):
+            log.warning('Could not write parse cache for %s', feature_path,
+                        exc_info=True)
+        return parsed
@@ -17,11 +17,11 @@ log = logging.getLogger('planterbox')
 
 EXAMPLE_TO_FORMAT = re.compile(r'<(.+?)>')
 FEATURE_NAME = re.compile(r'\.feature(?:\:[\d,]+)?$')
+STEP_PREFIX = r'^\s*(?:Given|And|When|Then|But)\s+'
 
 
-def make_step(pattern, multiline, fn):
+def make_step(pattern, multiline, batch, fn):
     """Inner decorator for making a function usable as a step."""
-    planterbox_prefix = r'^\s*(?:Given|And|When|Then|But)\s+'
     planterbox_patterns = getattr(fn, 'planterbox_patterns', [])
 
     if multiline:
@@ -31,21 +31,28 @@ def make_step(pattern, multiline, fn):
             pattern = pattern + r'\n((?:.|\n)+)'
 
     planterbox_patterns.append(
-        re.compile(planterbox_prefix + pattern, re.IGNORECASE))
+        re.compile(STEP_PREFIX + pattern, re.IGNORECASE))
     fn.planterbox_patterns = planterbox_patterns
+    fn.planterbox_batch = getattr(fn, 'planterbox_batch', False) or bool(batch)
     return fn
 
 
-def step(pattern, multiline=False):
+def step(pattern, multiline=False, batch=False):
     """Decorate a function with a pattern so it can be used as a step.
 
+    The function may be a coroutine function; see planterbox.aio.
+
     Optional arguments:
     - multiline: If true, this step-pattern will be turned into a multiline
       pattern. This adds a regular expression to the end that captures all
       remaining lines as a single group. If a string, that string will be used
       as the name of the multiline group.
+    - batch: If true, the step is called once for all the examples of a
+      scenario outline that reach it, with a list of each argument's values
+      across those examples, and returns an outcome for each of them; see
+      planterbox.feature.run_batch_step.
     """
-    return partial(make_step, pattern, multiline)
+    return partial(make_step, pattern, multiline, batch)
 
 
 def make_hook(timing, stage, fn):
@@ -57,7 +64,10 @@ def make_hook(timing, stage, fn):
 
 
 def hook(timing, stage):
-    """Register a function as a hook to be run before or after """
+    """Register a function as a hook to be run before or after a stage
+
+    The function may be a coroutine function; see planterbox.aio.
+    """
 
     if timing not in ('before', 'after'):
         raise ValueError(timing)
@@ -65,3 +75,26 @@ def hook(timing, stage):
         raise ValueError(stage)
 
     return partial(make_hook, timing, stage)
+
+
+def make_fixture(scope, name, fn):
+    """Inner decorator for making a function usable as a fixture."""
+    fn.planterbox_fixture_scope = scope
+    fn.planterbox_fixture_name = name or fn.__name__
+    return fn
+
+
+def fixture(scope='scenario', name=None):
+    """Register a function as a fixture, cached for scope
+
+    scope is one of 'scenario', 'feature', 'package' or 'session'. The
+    function takes the active test case and returns the fixture's value, or
+    yields it once and then tears it down. Steps and hooks get the value with
+    test.fixture(name), where name defaults to the function's name; see
+    planterbox.fixtures.
+    """
+
+    if scope not in ('scenario', 'feature', 'package', 'session'):
+        raise ValueError(scope)
+
+    return partial(make_fixture, scope, name)
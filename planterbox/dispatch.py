@@ -0,0 +1,153 @@
+"""Index of step patterns for quickly finding the step matching a line.
+
+Every step pattern starts with the gherkin keyword prefix, followed by the
+pattern text given to ``@step``. When that pattern text starts with a plain
+word, only lines whose first word after the keyword is that same word can
+match it. The dispatcher buckets patterns by that word so that matching a line
+only tries the patterns from its bucket plus any patterns that could not be
+bucketed, in their original order.
+"""
+
+from collections import (
+    defaultdict,
+    OrderedDict,
+)
+import re
+import threading
+
+from .decorators import (
+    STEP_PREFIX,
+)
+from .exceptions import (
+    MixedStepParametersException,
+    UnmatchedStepException,
+)
+
+KEYWORD = re.compile(STEP_PREFIX, re.IGNORECASE)
+LINE_WORD = re.compile(r'\S*')
+PATTERN_WORD = re.compile(r'([^\s.^$*+?{}\[\]\\|()]+) (?![*+?{])')
+
+
+def pattern_word(pattern):
+    """Find the word that every line matched by a compiled pattern starts with.
+
+    Returns None if the pattern can't be reliably bucketed: it doesn't start
+    with the standard step prefix, it isn't followed by a plain ASCII word and a
+    space, or it contains alternation that could escape the prefix.
+    """
+    if pattern.flags & re.VERBOSE:
+        return None
+    if not pattern.pattern.startswith(STEP_PREFIX):
+        return None
+
+    body = pattern.pattern[len(STEP_PREFIX):]
+    if '|' in body:
+        return None
+
+    word_match = PATTERN_WORD.match(body)
+    if word_match is None:
+        return None
+
+    word = word_match.group(1)
+    if any(ord(c) > 127 for c in word):
+        return None
+    return word.lower()
+
+
+def step_arguments(step_match):
+    """Produce the arguments for a step from a successful pattern match"""
+    groupdict = step_match.groupdict()
+    if groupdict:
+        if len(groupdict) != len(step_match.groups()):
+            raise MixedStepParametersException()
+        return groupdict
+    return step_match.groups()
+
+
+class StepDispatcher(object):
+    """Finds the step function for a line from a scenario.
+
+    Built from a step inventory: a sequence of functions decorated with
+    ``@step``. Matching keeps the semantics of trying every pattern of every
+    step in inventory order and using the first that matches.
+    """
+
+    def __init__(self, step_inventory):
+        self.patterns = [
+            (step_fn, pattern)
+            for step_fn in step_inventory
+            for pattern in step_fn.planterbox_patterns
+        ]
+
+        by_word = defaultdict(list)
+        unbucketed = []
+        for position, (step_fn, pattern) in enumerate(self.patterns):
+            word = pattern_word(pattern)
+            if word is None:
+                unbucketed.append(position)
+            else:
+                by_word[word].append(position)
+
+        self.unbucketed = [self.patterns[p] for p in unbucketed]
+        self.buckets = {
+            word: [self.patterns[p] for p in sorted(positions + unbucketed)]
+            for word, positions in by_word.items()
+        }
+
+    def candidates(self, step):
+        """Return the patterns that could match step, in inventory order"""
+        keyword = KEYWORD.match(step)
+        if keyword is None:
+            return self.unbucketed
+
+        word = LINE_WORD.match(step, keyword.end()).group()
+        if any(ord(c) > 127 for c in word):
+            # Case-insensitive matching folds some non-ASCII characters onto
+            # ASCII ones; don't second-guess the regex engine.
+            return self.patterns
+        return self.buckets.get(word.lower(), self.unbucketed)
+
+    def match(self, step):
+        """Find the step function and arguments for a line from a scenario"""
+        for step_fn, pattern in self.candidates(step):
+            step_match = pattern.match(step)
+            if step_match is not None:
+                return step_fn, step_arguments(step_match)
+
+        raise UnmatchedStepException(step)
+
+
+class MatchCache(object):
+    """Bounded least-recently-used memo of a dispatcher's matches.
+
+    Only successful matches are remembered; lines that raise are re-matched
+    every time they are seen. Safe to share between threads.
+    """
+
+    def __init__(self, dispatcher, maxsize):
+        self.dispatcher = dispatcher
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def match(self, step):
+        """Find the step function and arguments for a line from a scenario"""
+        with self.lock:
+            try:
+                binding = self.entries.pop(step)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries[step] = binding
+                return binding
+
+        binding = self.dispatcher.match(step)
+        with self.lock:
+            self.entries.pop(step, None)
+            if len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+            self.entries[step] = binding
+        return binding
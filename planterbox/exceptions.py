@@ -1,6 +1,17 @@
 """Exceptions used to indicate planterbox-related states"""
 
 
+class BatchStepException(Exception):
+    """Raised when a batch step doesn't return one outcome per example"""
+    pass
+
+
+class FixtureException(Exception):
+    """Raised when a fixture is unknown, used outside its scope or doesn't
+    yield exactly once"""
+    pass
+
+
 class HookFailedException(Exception):
     """Propagate and summarize failure of a hook"""
     pass
@@ -11,6 +22,11 @@ class MixedStepParametersException(Exception):
     pass
 
 
+class TagExpressionException(ValueError):
+    """Raised when a --tag expression can't be parsed"""
+    pass
+
+
 class UnmatchedStepException(Exception):
     """Raised when a step cannot be found to execute a line from a scenario."""
     pass
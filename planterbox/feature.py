@@ -3,13 +3,27 @@
 from six.moves import (
     cStringIO as StringIO,
 )
+from collections import (
+    OrderedDict,
+)
+from contextlib import (
+    closing,
+    contextmanager,
+)
+import copy
 import csv
+import functools
 from importlib import import_module
 import io
+import itertools
 import logging
+from multiprocessing.pool import (
+    ThreadPool,
+)
 import os
 import re
 import sys
+import threading
 from unittest import (
     TestCase,
     SkipTest,
@@ -20,21 +34,55 @@ from nose2.util import (
 )
 
 from six import (
+    PY2,
+    reraise,
+    string_types,
     text_type,
 )
 
+from .aio import (
+    close_event_loop,
+    run_awaitable,
+)
 from .exceptions import (
+    BatchStepException,
+    FixtureException,
     HookFailedException,
-    MixedStepParametersException,
     UnmatchedStepException,
     UnmatchedSubstitutionException,
 )
+from .fixtures import (
+    FixtureScope,
+    package_fixtures,
+    session_fixtures,
+)
+from .history import (
+    active as active_durations,
+)
 from .parsing import (
     parse_feature,
 )
+from .profiling import (
+    profile_path,
+    profiling,
+)
+from .registry import (
+    StepRegistry,
+)
+from .tags import (
+    compile_tags,
+)
+from .timing import (
+    active as active_timings,
+    clock,
+    function_label,
+)
 from .util import (
     clean_dict_repr,
 )
+from .workers import (
+    worker_id,
+)
 
 log = logging.getLogger("planterbox")
 
@@ -59,9 +107,240 @@ class FeatureExcInfo(tuple):
         return self
 
 
+class RecordingResult(object):
+    """Stands in for a test result, recording each call to startTest,
+    stopTest and the add* methods of a scenario to replay later
+
+    Everything else, like shouldStop or failfast, is read from result. The
+    scenario's index is put back on the test while the calls are replayed,
+    as it is while the scenario runs, so outcomes are reported for it.
+    """
+
+    def __init__(self, result, scenario_index=None):
+        self.result = result
+        self.scenario_index = scenario_index
+        self.calls = []
+
+    def __getattr__(self, name):
+        if not (name in ("startTest", "stopTest") or name.startswith("add")):
+            return getattr(self.result, name)
+
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return record
+
+    def replay(self, result, test=None):
+        """Make the recorded calls on result, reporting them for test
+        instead of the test they were made for if it's given"""
+        for name, args, kwargs in self.calls:
+            if test is not None and args:
+                args = (test,) + tuple(args[1:])
+            if self.scenario_index is None or not args:
+                getattr(result, name)(*args, **kwargs)
+                continue
+            args[0].scenario_index = self.scenario_index
+            try:
+                getattr(result, name)(*args, **kwargs)
+            finally:
+                del args[0].scenario_index
+
+
+class LoggingResult(object):
+    """Stands in for a test result once there's none left to report to,
+    logging errors and failures"""
+
+    def addError(self, test, exc_info):
+        log.error("Error in %s", test, exc_info=exc_info)
+
+    addFailure = addError
+
+    def addSkip(self, test, reason):
+        pass
+
+    def startTest(self, test):
+        pass
+
+    def stopTest(self, test):
+        pass
+
+
+class SplitFeature(object):
+    """What the tests of a feature split into one test per scenario share
+
+    The feature hooks run once for all of them: before the first of them to
+    run, on that test, and after the last, on the same test. Attributes the
+    before feature hooks set on that test are copied to the others, and they
+    share the feature fixtures. nose2.plugins.mp workers load each
+    scenario's test on its own, so there a feature is kept open, and its
+    after feature hooks don't run, until close_split_features is called
+    when the worker stops.
+    """
+
+    def __init__(self, feature_id, keep_open=False):
+        self.feature_id = feature_id
+        self.keep_open = keep_open
+        self.pending = 0
+        self.tester = None
+        self.module = None
+        self.fixtures = None
+        self.attributes = {}
+        self.failed = False
+
+    def open(self, test, module, result):
+        """Run the before feature hooks on test, unless another test already
+        has, returning whether test's scenarios should run"""
+        if self.tester is None:
+            self.tester = test
+            self.module = module
+            self.fixtures = test.feature_fixtures = FixtureScope("feature")
+            names = set(test.__dict__)
+            try:
+                run_hooks(module, test, result, "before", "feature")
+            except HookFailedException:
+                self.failed = True  # Failure already registered.
+            self.attributes = {
+                name: value
+                for name, value in test.__dict__.items()
+                if name not in names
+            }
+        elif not self.failed:
+            test.__dict__.update(self.attributes)
+            test.feature_fixtures = self.fixtures
+        return not self.failed
+
+    def finish(self, result):
+        """Note that a test has run, closing the feature after the last"""
+        self.pending -= 1
+        if self.pending <= 0 and not self.keep_open:
+            self.close(result)
+
+    def close(self, result):
+        """Run the after feature hooks and tear down the feature fixtures,
+        if any test has run"""
+        if _split_features.get(self.feature_id) is self:
+            del _split_features[self.feature_id]
+        tester, self.tester = self.tester, None
+        if tester is None:
+            return
+        try:
+            if not self.failed:
+                run_hooks(self.module, tester, result, "after", "feature")
+        except HookFailedException:
+            pass  # Failure already registered.
+        finally:
+            tester.close_feature_fixtures(self.fixtures, result)
+            del tester.feature_fixtures
+
+
+_split_features = {}
+
+
+def split_feature(feature_id, keep_open=False):
+    """Find the SplitFeature shared by the split tests of a feature,
+    creating it if there isn't an open one"""
+    shared = _split_features.get(feature_id)
+    if shared is None:
+        shared = _split_features[feature_id] = SplitFeature(
+            feature_id, keep_open
+        )
+    return shared
+
+
+def close_split_features(result=None):
+    """Close every split feature still open, reporting to result, or
+    logging errors without one"""
+    if result is None:
+        result = LoggingResult()
+    for shared in list(_split_features.values()):
+        shared.close(result)
+
+
+class OutlineTemplate(object):
+    """The steps of a scenario outline, split once around their placeholders
+    so that examples can be substituted into them cheaply
+
+    placeholders holds the names of each step's placeholders, in order.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.literals = []
+        self.placeholders = []
+        for step in self.steps:
+            parts = EXAMPLE_TO_FORMAT.split(step)
+            self.literals.append(parts[0::2])
+            self.placeholders.append(parts[1::2])
+
+    def check(self, header):
+        """Check that every placeholder names a column of the examples'
+        header, raising UnmatchedSubstitutionException if one doesn't
+
+        Returns how many columns an example needs for every placeholder to
+        have a value.
+        """
+        header = list(header)
+        columns = 0
+        for placeholders in self.placeholders:
+            for name in placeholders:
+                if name not in header:
+                    raise UnmatchedSubstitutionException(
+                        name,
+                        '"{key}" missing from outline examples {header}'.format(
+                            key=name,
+                            header=" | ".join(header),
+                        ),
+                    )
+                columns = max(columns, header.index(name) + 1)
+        return columns
+
+    def missing(self, example):
+        """Raise UnmatchedSubstitutionException for the first placeholder an
+        example, with fewer values than its header, has no value for"""
+        for placeholders in self.placeholders:
+            for name in placeholders:
+                if name not in example:
+                    raise UnmatchedSubstitutionException(
+                        name,
+                        '"{key}" missing from outline example {example}'.format(
+                            key=name,
+                            example=clean_dict_repr(example),
+                        ),
+                    )
+
+    def render(self, example):
+        """Substitute an example's values into the steps
+
+        The example must have a value for every placeholder: see check.
+        """
+        return [
+            self.render_step(literals, placeholders, example)
+            if placeholders
+            else step
+            for step, literals, placeholders in zip(
+                self.steps, self.literals, self.placeholders
+            )
+        ]
+
+    @staticmethod
+    def render_step(literals, placeholders, example):
+        parts = [literals[0]]
+        for name, literal in zip(placeholders, literals[1:]):
+            value = example[name]
+            parts.append(value if isinstance(value, string_types) else text_type(value))
+            parts.append(literal)
+        return "".join(parts)
+
+
 class FeatureTestCase(TestCase):
     """A test case generated from the scenarios in a feature file."""
 
+    timings = None
+    durations = None
+    feature_fixtures = None
+    scenario_fixtures = None
+    split_feature = None
+
     def __init__(
         self,
         feature_path,
@@ -69,30 +348,61 @@ class FeatureTestCase(TestCase):
         feature_text=None,
         config=None,
         tag_list=(),
+        step_registry=None,
+        parse_cache=None,
+        profile_dir=None,
     ):
         super(FeatureTestCase, self).__init__("nota")
         self.feature_path = feature_path
         self.scenarios_to_run = scenarios_to_run
         self.config = config
 
-        if feature_text is None:
+        if feature_text is not None:
+            self.feature = parse_feature(feature_text)
+        elif parse_cache is not None:
+            self.feature = parse_cache.parse(feature_path)
+        else:
             with io.open(feature_path, mode="r", encoding="utf-8") as f:
-                feature_text = f.read()
-
-        header_text, self.scenarios = parse_feature(feature_text)
-        self.feature_name = (
-            header_text[0]
-            .strip()
-            .replace(
-                "Feature:",
-                "",
+                self.feature = parse_feature(f)
+
+        self.scenarios = self.feature.scenarios
+        self.feature_name = self.feature.name
+        self.feature_doc = list(self.feature.doc)
+        self._step_registry = step_registry
+        self.match_cache = None
+        self.plan = None
+        self.tag_list = tag_list
+        self.tag_expression = compile_tags(tag_list)
+        self.profile_dir = profile_dir
+
+    @property
+    def step_registry(self):
+        """The steps and hooks of this feature's package, found on first use"""
+        if self._step_registry is None:
+            self._step_registry = StepRegistry.for_module(
+                import_module(self.__module__)
             )
-            .strip()
-        )
-        self.feature_doc = [doc.strip() for doc in header_text[1:]]
-        self.step_inventory = list(self.harvest_steps())
-        self.check_scenarios()
-        self.tag_list = check_tag_list(tag_list)
+        return self._step_registry
+
+    def use_match_cache(self):
+        """Share the package's cache of step matches, if match-cache-size
+        is configured"""
+        if self.match_cache is not None or not self.config:
+            return
+        match_cache_size = self.config.as_int("match-cache-size", 0)
+        if match_cache_size > 0:
+            self.match_cache = self.step_registry.get_match_cache(match_cache_size)
+
+    @property
+    def worker_id(self):
+        """The id of the nose2.plugins.mp worker running this feature, or 0
+        without workers; see planterbox.workers"""
+        return worker_id()
+
+    @property
+    def step_inventory(self):
+        """The steps available to this feature"""
+        return self.harvest_steps()
 
     def id(self):
         if self.scenarios_to_run:
@@ -112,187 +422,369 @@ class FeatureTestCase(TestCase):
         )
 
     def load_examples(self, examples):
+        """Yield each example of an outline as a dict of values by column name
+
+        Examples files are read lazily, one row at a time.
+        """
         if not examples:
             return
 
-        if "Examples file:" in examples[0]:
-            if examples[1][-4:] != ".csv":
+        rows = self.example_rows(examples)
+        try:
+            example_header = next(rows, None)
+            if example_header is None:
+                return
+            for example_data in rows:
+                yield dict(zip(example_header, example_data))
+        finally:
+            rows.close()
+
+    def example_rows(self, examples):
+        """Iterate over the header and then the values of each row of an
+        outline's examples, as lists"""
+        if examples.file is not None:
+            if not examples.file.endswith(".csv"):
                 raise Exception("Example file must be a csv file.")
-            else:
-                examples = self.read_file_into_examples(examples[1].strip())
+            return self.read_file_into_examples(examples.file)
+        return (example_row(example) for example in examples.rows)
 
-        example_header = example_row(examples[0])
+    def examples_header(self, examples):
+        """The column names of an outline's examples, or None if it has no
+        examples"""
+        if not examples:
+            return None
+        rows = self.example_rows(examples)
+        try:
+            return next(rows, None)
+        finally:
+            rows.close()
 
-        for example in examples[1:]:
-            example_data = example_row(example)
-            yield {label: datum for label, datum in zip(example_header, example_data)}
+    def examples_path(self, fname):
+        """The path of an examples file, relative to this feature's file"""
+        return os.path.join(os.path.dirname(self.feature_path), fname.strip())
 
     def read_file_into_examples(self, fname):
-        import csv
-        import os
-
-        csv_examples = []
-
-        filename = os.path.join(os.path.dirname(self.feature_path), fname.strip())
-        print(filename)
-        with open(filename) as csv_file:
-            csv_reader = csv.reader(csv_file)
-            for row in csv_reader:
-                csv_examples.append(row)
-
-        formatted_list = [" | ".join(example) for example in csv_examples]
-
-        return formatted_list
+        """Yield the stripped values of each non-blank row of a csv examples
+        file, relative to this feature's file"""
+        filename = self.examples_path(fname)
+        if PY2:
+            csv_file = open(filename, "rb")
+        else:
+            csv_file = io.open(filename, mode="r", encoding="utf-8", newline="")
+        with csv_file:
+            for row in csv.reader(csv_file):
+                if row:
+                    yield [value.strip() for value in row]
 
     def harvest_steps(self):
         """Find all steps that have been imported into this feature's module"""
-        module = import_module(self.__module__)
-
-        return [
-            maybe_step
-            for maybe_step in [getattr(module, name) for name in dir(module)]
-            if (
-                hasattr(maybe_step, "__call__")
-                and hasattr(maybe_step, "planterbox_patterns")
-            )
-        ]
+        return self.step_registry.steps
 
     def match_step(self, step):
         """Find a matching function for a given step from a scenario"""
-        for step_fn in self.step_inventory:
-            for pattern in step_fn.planterbox_patterns:
-                step_match = pattern.match(step)
-                if step_match is not None and step_match.groupdict():
-                    if len(step_match.groupdict()) != len(step_match.groups()):
-                        raise MixedStepParametersException()
-                    return step_fn, step_match.groupdict()
-                elif step_match is not None:
-                    return step_fn, step_match.groups()
-
-        raise UnmatchedStepException(step)
+        if self.match_cache is not None:
+            return self.match_cache.match(step)
+        return self.step_registry.dispatcher.match(step)
 
     def nota(self):
         """Stub method to satisfy TestCase's obsessive need for a test"""
 
     def run(self, result=None):
-        module = import_module(self.__module__)
+        self.timings = active_timings()
+        self.durations = active_durations()
+        try:
+            # Features loaded from a manifest import their package here
+            module = import_module(self.__module__)
+            if self.plan is None:
+                self.check_scenarios()
+        except KeyboardInterrupt:
+            raise
+        except Exception:
+            result.startTest(self)
+            result.addError(self, sys.exc_info())
+            result.stopTest(self)
+            if self.split_feature is not None:
+                self.split_feature.finish(result)
+            return
+
+        if self.split_feature is not None:
+            self.run_split(module, result)
+            return
+
+        threads = 0
+        if self.config and self.profile_dir is None:
+            # cProfile can only profile one thread at a time
+            threads = self.config.as_int("scenario-threads", 0)
+
+        self.feature_fixtures = FixtureScope("feature")
         try:
             run_hooks(module, self, result, "before", "feature")
             try:
-                for i, scenario in enumerate(self.scenarios):
-
-                    (
-                        self.scenario_name,
-                        scenario_steps,
-                        scenario_examples,
-                        scenario_tags,
-                    ) = scenario
-
-                    if not matches_tag(scenario_tags, self.tag_list) or (
-                        self.scenarios_to_run
-                        and not self.should_run_scenario(i, scenario)
-                    ):
-                        continue
-
-                    if scenario_examples:
-                        scenario_examples = list(self.load_examples(scenario_examples))
-                        self.original_scenario_name = self.scenario_name
-                        self.scenario_example_name(scenario_examples[0])
-
-                    result.startTest(self)
-                    try:
-                        if scenario_examples:
-                            self.run_outline(
-                                module=module,
-                                index=i,
-                                scenario=scenario_steps,
-                                examples=scenario_examples,
-                                result=result,
-                            )
-                        else:
-                            self.run_scenario(
-                                module=module,
-                                index=i,
-                                scenario=scenario_steps,
-                                result=result,
-                            )
-                    finally:
-                        result.stopTest(self)
-                        del self.scenario_name
+                if threads > 1:
+                    self.run_concurrently(module, result, threads)
+                else:
+                    for scenario in self.selected_scenarios():
+                        self.run_selected_scenario(module, scenario, result)
             finally:
                 run_hooks(module, self, result, "after", "feature")
         except HookFailedException:
-            return  # Failure already registered.
+            pass  # Failure already registered.
+        finally:
+            self.close_feature_fixtures(self.feature_fixtures, result)
+            del self.feature_fixtures
 
-    def should_run_scenario(self, i, scenario):
-        """Decide whether to run this scenario when running a subset"""
-        scenario_name = scenario[0].partition(":")[2].strip()
+    def run_split(self, module, result):
+        """Run the scenario of a test split from a feature, sharing the
+        feature hooks and fixtures with the feature's other tests"""
+        shared = self.split_feature
+        try:
+            if shared.open(self, module, result):
+                for scenario in self.selected_scenarios():
+                    self.run_selected_scenario(module, scenario, result)
+        finally:
+            shared.finish(result)
+            if shared.tester is not self:
+                self.__dict__.pop("feature_fixtures", None)
+
+    def run_selected_scenario(self, module, scenario, result):
+        """Run one selected scenario, reporting it to result as a test
+
+        The examples of an outline are read as they're run, so an examples
+        file is never loaded into memory all at once.
+        """
+        i = scenario.index
+        self.scenario_name = scenario.text
+        scenario_steps = scenario.step_texts
+        scenario_examples = None
+        first_example = None
 
-        no_trailing_period = (
-            scenario_name[:-1] if scenario_name[-1] == "." else scenario_name
+        if scenario.examples:
+            scenario_examples = self.load_examples(scenario.examples)
+            first_example = next(scenario_examples, None)
+            self.original_scenario_name = self.scenario_name
+            if first_example is not None:
+                self.scenario_example_name(first_example)
+
+        planned_steps, bindings = self.plan.get(i, (None, None))
+        result.startTest(self)
+        if self.timings is not None or self.durations is not None:
+            started = clock()
+        try:
+            if scenario_examples is None:
+                with self.profile_scenario(i):
+                    self.run_scenario(
+                        module=module,
+                        index=i,
+                        scenario=scenario_steps,
+                        result=result,
+                        bindings=bindings,
+                    )
+            elif first_example is None:
+                result.addSkip(self, "Scenario outline has no examples")
+            else:
+                self.run_outline(
+                    module=module,
+                    index=i,
+                    scenario=scenario_steps,
+                    header=self.examples_header(scenario.examples),
+                    examples=itertools.chain([first_example], scenario_examples),
+                    result=result,
+                    planned_steps=planned_steps,
+                    bindings=bindings,
+                )
+        finally:
+            if scenario_examples is not None:
+                scenario_examples.close()
+            if self.timings is not None or self.durations is not None:
+                scenario_id = "{}:{}".format(self.feature_id(), i)
+                duration = clock() - started
+                if self.timings is not None:
+                    self.timings.add(
+                        "scenario",
+                        "{} ({})".format(scenario.name, scenario_id),
+                        duration,
+                    )
+                if self.durations is not None:
+                    self.durations.add("scenario", scenario_id, duration)
+            result.stopTest(self)
+            del self.scenario_name
+
+    def run_concurrently(self, module, result, threads):
+        """Run the selected scenarios on a pool of threads
+
+        Each scenario runs in its own copy of this test case, so per-scenario
+        state like ``scenario_name`` and ``step`` isn't shared, and reports to
+        a RecordingResult. Recordings are replayed into result on this thread
+        in scenario order, so every startTest is followed by its own outcome
+        and stopTest. The event loops of async steps and hooks on the pool's
+        threads are closed once all the scenarios have run.
+        """
+        pool_threads = []
+        pool = ThreadPool(
+            threads,
+            initializer=lambda: pool_threads.append(threading.current_thread().ident),
         )
+        try:
+            recordings = pool.imap(
+                functools.partial(self.run_isolated_scenario, module, result),
+                self.selected_scenarios(),
+            )
+            for recording in recordings:
+                recording.replay(result)
+        finally:
+            pool.close()
+            pool.join()
+            for thread_ident in pool_threads:
+                close_event_loop(thread_ident)
+
+    def run_isolated_scenario(self, module, result, scenario):
+        """Run a scenario in a copy of this test case, recording its results"""
+        context = copy.copy(self)
+        context._cleanups = []
+        recording = RecordingResult(result, scenario.index)
+        context.run_selected_scenario(module, scenario, recording)
+        return recording
+
+    def selected_scenarios(self):
+        """Yield each scenario selected to run"""
+        for scenario in self.scenarios:
+            if (
+                self.tag_expression is not None
+                and not self.tag_expression.matches(scenario.tags)
+            ) or (
+                self.scenarios_to_run and not self.should_run_scenario(scenario)
+            ):
+                continue
+            yield scenario
+
+    def split_scenarios(self, keep_open=False):
+        """Produce a separate test case for each scenario selected to run
 
+        Each has the id of its scenario, like ``package:name.feature:3``.
+        They share one SplitFeature, so the feature hooks run once around all
+        of them; keep_open keeps it open once they've all run, for more tests
+        of the feature loaded later, as in nose2.plugins.mp workers.
+        """
+        shared = split_feature(self.feature_id(), keep_open)
+        tests = []
+        for scenario in self.selected_scenarios():
+            test = copy.copy(self)
+            test._cleanups = []
+            test.scenarios_to_run = {scenario.index}
+            test.plan = None
+            test.split_feature = shared
+            shared.pending += 1
+            tests.append(test)
+        return tests
+
+    def should_run_scenario(self, scenario):
+        """Decide whether to run this scenario when running a subset"""
         return (
-            scenario_name in self.scenarios_to_run
-            or no_trailing_period in self.scenarios_to_run
-            or i in self.scenarios_to_run
+            scenario.name in self.scenarios_to_run
+            or scenario.short_name in self.scenarios_to_run
+            or scenario.index in self.scenarios_to_run
         )
 
     def check_scenarios(self):
-        """ Verify scenario steps match defined steps"""
-        for scenario in self.scenarios:
-            (
-                self.scenario_name,
-                scenario_steps,
-                scenario_examples,
-                scenario_tags,
-            ) = scenario
-            if scenario_examples:
+        """Verify the steps of the selected scenarios match defined steps
+
+        Builds the execution plan used by run(): for each scenario, the steps
+        that were checked and the (step function, arguments) bound to each.
+        Outlines are checked against their first example.
+        """
+        self.use_match_cache()
+        plan = {}
+        for scenario in self.selected_scenarios():
+            scenario_steps = scenario.step_texts
+            if scenario.examples:
                 # Do the example thing
-                unmatched = []
-                scenario_examples = list(self.load_examples(scenario_examples))
+                with closing(self.load_examples(scenario.examples)) as examples:
+                    scenario_example = next(examples, None)
+                if scenario_example is None:
+                    continue
+                template = OutlineTemplate(scenario_steps)
                 try:
-                    for scenario_example in scenario_examples:
-                        substituted_scenario = substitute_steps(
-                            scenario_steps, scenario_example
-                        )
-                        unmatched.extend(self.check_steps(substituted_scenario))
-                        break
+                    columns = template.check(self.examples_header(scenario.examples))
+                    if len(scenario_example) < columns:
+                        template.missing(scenario_example)
+                    scenario_steps = template.render(scenario_example)
                 except UnmatchedSubstitutionException as ke:
                     raise UnmatchedStepException(ke.args[0])
-            else:
-                unmatched = self.check_steps(scenario_steps)
+
+            bindings, unmatched = self.resolve_steps(scenario_steps)
             if len(unmatched) > 0:
                 # combine all unmatched steps into one string and raise exception with it
                 raise UnmatchedStepException(
                     "Unmatched steps:\n" + "\n".join(unmatched)
                 )
+            plan[scenario.index] = (scenario_steps, bindings)
+        self.plan = plan
+
+    def resolve_steps(self, scenario_steps):
+        """Bind each step to its step function and arguments
 
-    def check_steps(self, scenario_steps):
+        Returns the bindings and a list of any steps that couldn't be matched.
+        """
+        bindings = []
         unmatched = []
         for step in scenario_steps:
             try:
-                self.match_step(step)
+                bindings.append(self.match_step(step))
             except UnmatchedStepException:
                 unmatched.append(step)
-        return unmatched
+        return bindings, unmatched
+
+    def run_scenario(self, module, index, scenario, result, bindings=None):
+        """Run the steps of a scenario; see scenario_runner"""
+        run_lockstep(
+            self,
+            [self.scenario_runner(module, index, scenario, result, bindings)],
+        )
 
-    def run_scenario(self, module, index, scenario, result):
+    def scenario_runner(self, module, index, scenario, result, bindings=None):
+        """Run the steps of a scenario, pausing at each batch step
+
+        bindings, if given, are the (step function, arguments) for each step,
+        as planned by check_scenarios, or None for steps that still need to be
+        matched. At a batch step this generator yields its position, step
+        function and arguments, and must be sent the (outcome, exc_info) of
+        calling it: see run_lockstep.
+        """
         completed_steps = []
         self.scenario_index = index
         self.step = None
         self.step_function = None
+        self.scenario_fixtures = FixtureScope("scenario")
         try:
             run_hooks(module, self, result, "before", "scenario")
-            for step in scenario:
-                step_fn, step_arguments = self.match_step(step)
+            for position, step in enumerate(scenario):
+                binding = bindings[position] if bindings is not None else None
+                if binding is not None:
+                    step_fn, step_arguments = binding
+                else:
+                    step_fn, step_arguments = self.match_step(step)
                 self.step = step
                 self.step_function = step_fn
                 run_hooks(module, self, result, "before", "step")
-                if isinstance(step_arguments, dict):
-                    step_fn(self, **step_arguments)
+                if is_batch_step(step_fn):
+                    outcome, exc_info = yield position, step_fn, step_arguments
+                    if exc_info is not None:
+                        reraise(*exc_info)
+                    raise_outcome(outcome)
                 else:
-                    step_fn(self, *step_arguments)
+                    started = clock() if self.timings is not None else None
+                    try:
+                        if isinstance(step_arguments, dict):
+                            run_awaitable(step_fn(self, **step_arguments))
+                        else:
+                            run_awaitable(step_fn(self, *step_arguments))
+                    finally:
+                        if started is not None:
+                            self.timings.add(
+                                "step",
+                                function_label(step_fn),
+                                clock() - started,
+                            )
                 completed_steps.append(step)
                 run_hooks(module, self, result, "after", "step")
             result.addSuccess(self)
@@ -326,36 +818,219 @@ class FeatureTestCase(TestCase):
             run_hooks(module, self, result, "after", "error")
             del self.exc_info
         finally:
+            self.close_fixtures(self.scenario_fixtures, result)
+            del self.scenario_fixtures
             del self.scenario_index
             del self.step
             del self.step_function
 
-    def run_outline(self, module, index, scenario, examples, result):
+    def run_outline(
+        self,
+        module,
+        index,
+        scenario,
+        header,
+        examples,
+        result,
+        planned_steps=None,
+        bindings=None,
+    ):
+        """Run a scenario outline once for each of its examples
+
+        The placeholders are checked against the examples' header once; if
+        one isn't a column, the outline fails without running any example.
+        Examples are read as they're run, unless the outline may use a batch
+        step: see run_batched_outline. Steps without placeholders reuse their
+        planned bindings in every example.
+        """
+        template = OutlineTemplate(scenario)
+        try:
+            columns = template.check(header)
+        except UnmatchedSubstitutionException as uso:
+            self.add_substitution_error(index, uso, result)
+            return
+
+        static_bindings = None
+        if bindings is not None:
+            static_bindings = [
+                None if template.placeholders[position] else binding
+                for position, binding in enumerate(bindings)
+            ]
+
+        if self.may_batch(template, bindings or ()):
+            self.run_batched_outline(
+                module,
+                index,
+                template,
+                columns,
+                examples,
+                result,
+                planned_steps,
+                bindings,
+                static_bindings,
+            )
+            return
+
         for i, example in enumerate(examples):
             if i != 0:
                 result.stopTest(self)
                 self.scenario_example_name(example)
                 result.startTest(self)
-            try:
-                example_scenario = substitute_steps(scenario, example)
-            except UnmatchedSubstitutionException as uso:
-                self.exc_info = FeatureExcInfo.from_exc_info(
-                    sys.exc_info(),
-                    scenario_index=index,
-                    scenario_name=self.scenario_name,
-                    completed_steps=[],
-                    failed_step=uso.step,
+            if len(example) < columns:
+                try:
+                    template.missing(example)
+                except UnmatchedSubstitutionException as uso:
+                    self.add_substitution_error(index, uso, result)
+                    continue
+            example_scenario = template.render(example)
+
+            with self.profile_scenario(index, i):
+                self.run_scenario(
+                    module=module,
+                    index=index,
+                    scenario=example_scenario,
+                    result=result,
+                    bindings=(
+                        bindings
+                        if example_scenario == planned_steps
+                        else static_bindings
+                    ),
                 )
-                result.addError(self, self.exc_info)
-                continue
 
-            self.run_scenario(
-                module=module,
-                index=index,
-                scenario=example_scenario,
-                result=result,
+    def add_substitution_error(self, index, uso, result):
+        """Report an outline placeholder without a value as an error"""
+        self.exc_info = FeatureExcInfo.from_exc_info(
+            sys.exc_info(),
+            scenario_index=index,
+            scenario_name=self.scenario_name,
+            completed_steps=[],
+            failed_step=uso.step,
+        )
+        result.addError(self, self.exc_info)
+
+    def may_batch(self, template, bindings):
+        """Whether any example of an outline may bind a step to a batch step
+
+        Only steps with placeholders can bind differently from the planned
+        bindings, so those are only a concern if the package has batch steps.
+        """
+        if any(is_batch_step(step_fn) for step_fn, step_arguments in bindings):
+            return True
+        return any(template.placeholders) and any(
+            is_batch_step(step_fn) for step_fn in self.step_registry.steps
+        )
+
+    def run_batched_outline(
+        self,
+        module,
+        index,
+        template,
+        columns,
+        examples,
+        result,
+        planned_steps,
+        bindings,
+        static_bindings,
+    ):
+        """Run the examples of an outline side by side, so that each batch
+        step is called once for every example that reaches it
+
+        Each example runs in its own copy of this test case and reports to a
+        RecordingResult; see run_lockstep. The recordings are replayed into
+        result in example order once every example has finished. The whole
+        outline is profiled together.
+        """
+        rows = []
+        runners = []
+        for example in examples:
+            row = copy.copy(self)
+            row._cleanups = []
+            row.scenario_example_name(example)
+            recording = RecordingResult(result, index)
+            rows.append((example, recording))
+            if len(example) < columns:
+                try:
+                    template.missing(example)
+                except UnmatchedSubstitutionException as uso:
+                    row.add_substitution_error(index, uso, recording)
+                    continue
+            example_scenario = template.render(example)
+            runners.append(
+                row.scenario_runner(
+                    module,
+                    index,
+                    example_scenario,
+                    recording,
+                    bindings=(
+                        bindings
+                        if example_scenario == planned_steps
+                        else static_bindings
+                    ),
+                )
             )
 
+        with self.profile_scenario(index):
+            run_lockstep(self, runners)
+
+        for i, (example, recording) in enumerate(rows):
+            if i != 0:
+                result.stopTest(self)
+                self.scenario_example_name(example)
+                result.startTest(self)
+            recording.replay(result, self)
+
+    def fixture(self, name):
+        """Get the value of a fixture of this feature's package, creating it
+        if it isn't cached for its scope yet; see planterbox.fixtures"""
+        fixture_fn = self.step_registry.fixtures.get(name)
+        if fixture_fn is None:
+            raise FixtureException(
+                'No fixture "{}" in {}'.format(name, self.__module__)
+            )
+
+        scope = fixture_fn.planterbox_fixture_scope
+        if scope == "session":
+            fixtures = session_fixtures
+        elif scope == "package":
+            fixtures = package_fixtures(self.__module__)
+        elif scope == "feature":
+            fixtures = self.feature_fixtures
+        else:
+            fixtures = self.scenario_fixtures
+        if fixtures is None:
+            raise FixtureException(
+                '"{}" is a {} fixture, used outside a {}'.format(name, scope, scope)
+            )
+        return fixtures.get(fixture_fn, self)
+
+    def close_fixtures(self, fixtures, result):
+        """Tear down the fixtures of a scope, reporting errors to result"""
+        for exc_info in fixtures.close():
+            result.addError(self, exc_info)
+
+    def close_feature_fixtures(self, fixtures, result):
+        """Tear down the feature fixtures after the last scenario has been
+        reported, reporting errors to result as a test of their own"""
+        errors = fixtures.close()
+        if errors:
+            result.startTest(self)
+            for exc_info in errors:
+                result.addError(self, exc_info)
+            result.stopTest(self)
+
+    @contextmanager
+    def profile_scenario(self, index, example_index=None):
+        """Profile a scenario, or an example of an outline, into profile_dir
+        if it's set"""
+        if self.profile_dir is None:
+            yield
+            return
+
+        with profiling(
+            profile_path(self.profile_dir, self.feature_id(), index, example_index)
+        ):
+            yield
+
     def scenario_example_name(self, example):
         self.scenario_name = "{} <- {}".format(
             self.original_scenario_name,
@@ -400,43 +1075,133 @@ def example_row(row):
     return [i.strip() for i in items]
 
 
-def substitute_step(step):
-    """Turn gherkin example syntax into python format string"""
-    step = step.replace("{", "{{")
-    step = step.replace("}", "}}")
-    step = EXAMPLE_TO_FORMAT.sub(r"{\g<1>}", step)
-    return step
-
-
 def substitute_steps(scenario, example):
     """Substitute example values into a scenario to produce runnable steps"""
-    try:
-        return [substitute_step(step).format(**example) for step in scenario]
-    except KeyError as ke:
-        raise UnmatchedSubstitutionException(
-            ke.args[0],
-            '"{key}" missing from outline example {example}'.format(
-                key=ke.args[0],
-                example=clean_dict_repr(example),
-            ),
+    template = OutlineTemplate(scenario)
+    template.missing(example)
+    return template.render(example)
+
+
+def is_batch_step(step_fn):
+    return getattr(step_fn, "planterbox_batch", False) is True
+
+
+def run_batch_step(tester, step_fn, arguments):
+    """Call a batch step once for the arguments of several examples
+
+    arguments holds the step arguments of each example. The step is called
+    with a list of each argument's values, in example order, by name or
+    position like any other step. It returns None if every example passed,
+    or an outcome for each example: an exception instance for an example
+    that failed, and anything else for one that passed.
+    """
+    if arguments and isinstance(arguments[0], dict):
+        outcomes = run_awaitable(
+            step_fn(
+                tester,
+                **{
+                    name: [example[name] for example in arguments]
+                    for name in arguments[0]
+                }
+            )
+        )
+    else:
+        outcomes = run_awaitable(
+            step_fn(tester, *[list(column) for column in zip(*arguments)])
+        )
+
+    if outcomes is None:
+        return [None] * len(arguments)
+    outcomes = list(outcomes)
+    if len(outcomes) != len(arguments):
+        raise BatchStepException(
+            "{} returned {} outcomes for {} examples".format(
+                getattr(step_fn, "__name__", step_fn), len(outcomes), len(arguments)
+            )
         )
+    return outcomes
+
+
+def run_lockstep(tester, runners):
+    """Run scenario runners from FeatureTestCase.scenario_runner side by
+    side, calling each batch step once for all the runners that reach it
+
+    Every runner runs until it finishes or reaches a batch step. Then the
+    runners paused at the earliest position are sent the outcomes of one
+    call of each batch step they're paused at, with tester as its test, and
+    run on. A runner that failed before a batch step has finished, so it
+    isn't part of the call.
+    """
+    paused = {}
+
+    def resume(i, value):
+        try:
+            paused[i] = runners[i].send(value)
+        except StopIteration:
+            pass
+
+    for i in range(len(runners)):
+        resume(i, None)
+
+    while paused:
+        position = min(step_position for step_position, _, _ in paused.values())
+        batches = OrderedDict()
+        for i in sorted(paused):
+            step_position, step_fn, step_arguments = paused[i]
+            if step_position == position:
+                batches.setdefault(step_fn, []).append(i)
+
+        for step_fn, batch in batches.items():
+            arguments = [paused.pop(i)[2] for i in batch]
+            if tester.timings is not None:
+                started = clock()
+            try:
+                outcomes = run_batch_step(tester, step_fn, arguments)
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                exc_info = sys.exc_info()
+                for i in batch:
+                    resume(i, (None, exc_info))
+                continue
+            finally:
+                if tester.timings is not None:
+                    tester.timings.add(
+                        "step",
+                        function_label(step_fn),
+                        clock() - started,
+                    )
+            for i, outcome in zip(batch, outcomes):
+                resume(i, (outcome, None))
+
+
+def raise_outcome(outcome):
+    """Raise the outcome of a batch step for one example, if it failed"""
+    if isinstance(outcome, BaseException):
+        raise outcome
 
 
 def run_hooks(module, tester, result, timing, stage):
-    for symbol in dir(module):
-        maybe_hook = getattr(module, symbol)
-        maybe_hook_timing = getattr(maybe_hook, "planterbox_hook_timing", set())
-        if (
-            hasattr(maybe_hook, "__call__")
-            and hasattr(maybe_hook_timing, "__iter__")
-            and (timing, stage) in maybe_hook_timing
-        ):
-            run_hook(tester, result, maybe_hook)
+    timings = tester.timings
+    for hook in tester.step_registry.hooks.get((timing, stage), ()):
+        if timings is None:
+            run_hook(tester, result, hook)
+            continue
+
+        started = clock()
+        try:
+            run_hook(tester, result, hook)
+        finally:
+            timings.add(
+                "hook",
+                "{} ({} {})".format(function_label(hook), timing, stage),
+                clock() - started,
+            )
 
 
 def run_hook(tester, result, hook):
     try:
-        hook(tester)
+        run_awaitable(hook(tester))
     except KeyboardInterrupt:
         raise
     except SkipTest as e:
@@ -445,20 +1210,3 @@ def run_hook(tester, result, hook):
     except Exception as e:
         result.addError(tester, sys.exc_info())
         raise HookFailedException("Error")
-
-
-def matches_tag(scenario_tags, tag_list):
-    """If tags indicated on command line, returns True if a Scenario_tag matches
-    one given on the command line"""
-    if not tag_list:
-        return True
-    else:
-        return set(scenario_tags).intersection(tag_list)
-
-
-def check_tag_list(tag_list):
-    """ Makes a list of any tags entered on the command line. """
-    tags = []
-    if len(tag_list) != 0:
-        tags = tag_list[0].split(",")
-    return tags
\ No newline at end of file
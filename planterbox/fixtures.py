@@ -0,0 +1,135 @@
+"""Fixtures: expensive resources shared by scenarios, features or packages.
+
+A fixture is a function decorated with ``@planterbox.fixture(scope=...)``
+that takes the active test case and returns the resource, or yields it once
+and then tears it down. A step or hook gets the resource with
+``test.fixture('name')``. Fixtures are created on first use and cached for
+their scope:
+
+- ``scenario``: a scenario, or one example of an outline
+- ``feature``: a run of a feature's scenarios
+- ``package``: every feature in the fixture's package, for the whole run
+- ``session``: every feature, for the whole run
+
+Each scope tears its fixtures down in the reverse of the order they were
+created in, so a fixture that uses another is torn down first. Package and
+session fixtures are torn down at the end of the run.
+"""
+
+import atexit
+from collections import (
+    OrderedDict,
+)
+import inspect
+import logging
+import sys
+import threading
+
+from .aio import (
+    run_awaitable,
+)
+from .exceptions import (
+    FixtureException,
+)
+
+log = logging.getLogger('planterbox')
+
+SCOPES = ('scenario', 'feature', 'package', 'session')
+
+
+class FixtureScope(object):
+    """The fixtures created for one scope, with their teardowns"""
+
+    def __init__(self, name):
+        self.name = name
+        self.values = {}
+        self.teardowns = []
+        # Reentrant: a fixture may use other fixtures of its scope
+        self.lock = threading.RLock()
+
+    def get(self, fixture_fn, test):
+        """Get the value of fixture_fn, creating it on first use"""
+        with self.lock:
+            if fixture_fn not in self.values:
+                self.values[fixture_fn] = self.create(fixture_fn, test)
+            return self.values[fixture_fn]
+
+    def create(self, fixture_fn, test):
+        value = fixture_fn(test)
+        if inspect.isgenerator(value):
+            generator = value
+            try:
+                value = next(generator)
+            except StopIteration:
+                raise FixtureException(
+                    '{} returned without yielding'.format(fixture_fn.__name__),
+                )
+            self.teardowns.append((fixture_fn, generator))
+            return value
+        return run_awaitable(value)
+
+    def close(self):
+        """Tear down every fixture, most recently created first
+
+        Returns the exc_info of each teardown that raised.
+        """
+        with self.lock:
+            teardowns, self.teardowns = self.teardowns, []
+            self.values = {}
+
+        errors = []
+        for fixture_fn, generator in reversed(teardowns):
+            try:
+                next(generator)
+            except StopIteration:
+                continue
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                errors.append(sys.exc_info())
+                continue
+            try:
+                raise FixtureException(
+                    '{} yielded more than once'.format(fixture_fn.__name__),
+                )
+            except FixtureException:
+                errors.append(sys.exc_info())
+        return errors
+
+
+session_fixtures = FixtureScope('session')
+_package_fixtures = OrderedDict()
+_package_fixtures_lock = threading.Lock()
+
+
+def package_fixtures(package_name):
+    """The scope of a package's package fixtures, created on first use"""
+    with _package_fixtures_lock:
+        scope = _package_fixtures.get(package_name)
+        if scope is None:
+            scope = _package_fixtures[package_name] = FixtureScope('package')
+        return scope
+
+
+def close_fixtures():
+    """Tear down every package fixture, package by package in the reverse of
+    the order they were first used in, and then every session fixture
+
+    Returns the exc_info of each teardown that raised.
+    """
+    with _package_fixtures_lock:
+        scopes = list(_package_fixtures.values())
+        _package_fixtures.clear()
+    errors = []
+    for scope in reversed(scopes):
+        errors.extend(scope.close())
+    errors.extend(session_fixtures.close())
+    return errors
+
+
+def log_teardown_errors(errors):
+    for exc_info in errors:
+        log.error('Error tearing down a planterbox fixture', exc_info=exc_info)
+
+
+atexit.register(lambda: log_teardown_errors(close_fixtures()))
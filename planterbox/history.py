@@ -0,0 +1,126 @@
+"""Scenario durations remembered between runs, for scheduling.
+
+With ``duration-history = True`` in the ``[planterbox]`` config section, the
+duration of every scenario is recorded, by scenario id
+(``package:file.feature:index``), in ``durations.json`` in the cache
+directory. Later runs order features, and the scenarios of split features,
+longest first, so that ``nose2.plugins.mp`` starts the slowest work first
+and its workers finish at about the same time.
+
+Scenarios without a recorded duration are estimated at the average of those
+with one.
+"""
+
+from unittest import (
+    TestSuite,
+)
+
+from .cache import (
+    load_state,
+    save_state,
+)
+from .timing import (
+    Timings,
+)
+
+HISTORY_FILE = 'durations.json'
+HISTORY_FORMAT = 1
+
+# Durations observed in this process, as 'scenario' records by scenario id
+observed = Timings()
+
+_enabled = False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def active():
+    """Return observed if durations are being recorded, otherwise None"""
+    return observed if _enabled else None
+
+
+class DurationHistory(object):
+    """Scenario durations by scenario id, loaded from and saved to path"""
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = self.load()
+
+    def load(self):
+        history = load_state(self.path, HISTORY_FORMAT) or {}
+        return history.get('scenarios', {})
+
+    def save(self):
+        save_state(
+            self.path, HISTORY_FORMAT, {'scenarios': self.durations},
+            'duration history',
+        )
+
+    def update(self, records):
+        """Remember the durations in records from observed.drain()"""
+        for kind, scenario_id, count, total, longest in records:
+            self.durations[scenario_id] = total
+
+    @property
+    def default(self):
+        if not self.durations:
+            return 0.0
+        return sum(self.durations.values()) / len(self.durations)
+
+    def estimate(self, test, default=None):
+        """Estimate how long a test or suite of tests will take to run"""
+        from .feature import FeatureTestCase
+
+        if default is None:
+            default = self.default
+        if isinstance(test, TestSuite):
+            return sum(self.estimate(t, default) for t in test)
+        if isinstance(test, FeatureTestCase):
+            feature_id = test.feature_id()
+            return sum(
+                self.durations.get(
+                    '{}:{}'.format(feature_id, scenario.index), default,
+                )
+                for scenario in test.selected_scenarios()
+            )
+        return 0.0
+
+    def longest_first(self, tests):
+        """Sort a list of tests or suites longest first, keeping the order
+        of those with the same estimate"""
+        default = self.default
+        return sorted(tests, key=lambda t: -self.estimate(t, default))
+
+    def sort_suite(self, suite):
+        """Sort a suite and every suite within it longest first, in place"""
+        default = self.default
+        estimates = {}
+
+        def estimate(test):
+            if id(test) not in estimates:
+                if isinstance(test, TestSuite):
+                    for t in test:
+                        estimate(t)
+                    estimates[id(test)] = sum(
+                        estimates[id(t)] for t in test
+                    )
+                else:
+                    estimates[id(test)] = self.estimate(test, default)
+            return estimates[id(test)]
+
+        def sort(suite):
+            for test in suite:
+                if isinstance(test, TestSuite):
+                    sort(test)
+            suite._tests.sort(key=lambda t: -estimate(t))
+
+        estimate(suite)
+        sort(suite)
@@ -0,0 +1,130 @@
+"""Failed scenarios remembered between runs, for rerunning them.
+
+The ids of failed and errored scenarios, ``package:file.feature:index``, are
+kept in ``lastfailed.json`` in the cache directory. A failure that can't be
+pinned on one scenario, like an error in a ``before feature`` hook, is kept
+as the feature's id, ``package:file.feature``, and stands for all of its
+scenarios.
+
+After each run, the scenarios that ran are dropped from the file and those
+that failed are added, so a run of just some features doesn't forget the
+failures of the rest.
+"""
+
+from .cache import (
+    load_state,
+    save_state,
+)
+
+STATE_FILE = 'lastfailed.json'
+STATE_FORMAT = 1
+
+
+def split_scenario_id(scenario_id):
+    """Split a scenario id into its feature id and index, which is None for
+    a feature id"""
+    feature_id, _, index = scenario_id.rpartition(':')
+    if feature_id and index.isdigit():
+        return feature_id, int(index)
+    return scenario_id, None
+
+
+def scenario_ids(test, exc_info=None):
+    """Find the ids of the scenarios an outcome of a FeatureTestCase is for
+
+    While a scenario runs, its index is on the test; for failures, it's also
+    on the FeatureExcInfo. Otherwise every selected scenario is blamed.
+    """
+    feature_id = test.feature_id()
+    index = getattr(exc_info, 'scenario_index', None)
+    if index is None:
+        index = getattr(test, 'scenario_index', None)
+    if index is not None:
+        return ['{}:{}'.format(feature_id, index)]
+    if test.scenarios_to_run:
+        return [
+            '{}:{}'.format(feature_id, scenario.index)
+            for scenario in test.selected_scenarios()
+        ]
+    return [feature_id]
+
+
+class LastFailed(object):
+    """The ids of the scenarios that failed when they last ran"""
+
+    def __init__(self, path):
+        self.path = path
+        self.failed = self.load()
+        self.by_feature = {}
+        for scenario_id in self.failed:
+            feature_id, index = split_scenario_id(scenario_id)
+            indexes = self.by_feature.setdefault(feature_id, set())
+            if index is None:
+                indexes.add(None)
+            else:
+                indexes.add(index)
+
+    def __bool__(self):
+        return bool(self.failed)
+
+    __nonzero__ = __bool__
+
+    def load(self):
+        state = load_state(self.path, STATE_FORMAT) or {}
+        return set(state.get('failed', ()))
+
+    def save(self):
+        save_state(
+            self.path, STATE_FORMAT, {'failed': sorted(self.failed)},
+            'failed scenarios',
+        )
+
+    def update(self, ran, failed):
+        """Forget the scenarios in ran, then remember those in failed"""
+        ran_features = {
+            scenario_id for scenario_id in ran
+            if split_scenario_id(scenario_id)[1] is None
+        }
+        self.failed = {
+            scenario_id for scenario_id in self.failed
+            if scenario_id not in ran
+            and split_scenario_id(scenario_id)[0] not in ran_features
+        } | set(failed)
+
+    def failed_scenarios(self, feature_id):
+        """Return the indexes of the failed scenarios of a feature: None if
+        none failed, or an empty set if the whole feature is to be rerun"""
+        indexes = self.by_feature.get(feature_id)
+        if indexes is None:
+            return None
+        if None in indexes:
+            return set()
+        return set(indexes)
+
+    def has_failed(self, test):
+        """Whether a test or any test in a suite includes a failed scenario"""
+        feature_id = getattr(test, 'feature_id', None)
+        if feature_id is None:
+            return any(self.has_failed(t) for t in getattr(test, '_tests', ()))
+
+        indexes = self.failed_scenarios(feature_id())
+        if indexes is None:
+            return False
+        if not indexes:
+            return True
+        return any(
+            scenario.index in indexes for scenario in test.selected_scenarios()
+        )
+
+    def failed_first(self, tests):
+        """Sort a list of tests or suites with failed scenarios first,
+        keeping their order otherwise"""
+        return sorted(tests, key=lambda t: not self.has_failed(t))
+
+    def sort_suite(self, suite):
+        """Move tests with failed scenarios first in a suite and every suite
+        within it, in place"""
+        for test in suite:
+            if hasattr(test, '_tests'):
+                self.sort_suite(test)
+        suite._tests = self.failed_first(suite._tests)
@@ -0,0 +1,211 @@
+"""A manifest of features, for collecting them without walking directories.
+
+``python -m planterbox manifest DIRECTORY`` finds every feature under
+DIRECTORY and writes ``manifest.json`` to the cache directory, listing each
+feature's package, path, content hash and scenarios, with their indexes,
+names and tags. Rebuilding it only reads and parses features whose size or
+modification time changed.
+
+With ``manifest = True`` in the ``[planterbox]`` config section, features in
+the manifest are loaded without importing their package, which is imported
+when the feature runs, and are filtered by ``--tag`` without being read.
+``--planterbox-manifest-discovery`` goes further, and discovers features
+from the manifest alone, without walking the start directory at all.
+
+Features added or renamed since the manifest was built aren't known to it:
+rebuild it whenever features are added, moved or retagged.
+"""
+
+import hashlib
+import io
+import logging
+import os
+
+from nose2.util import (
+    name_from_path,
+)
+
+from .cache import (
+    load_state,
+    read_feature_text,
+    save_state,
+)
+from .parsing import (
+    parse_feature,
+)
+
+log = logging.getLogger('planterbox')
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+
+def find_features(directory):
+    """Yield the path of every feature under directory, in sorted order,
+    skipping hidden directories"""
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(
+            dirname for dirname in dirnames
+            if not dirname.startswith('.') and dirname != '__pycache__'
+        )
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1] == '.feature':
+                yield os.path.join(dirpath, filename)
+
+
+def is_within(path, directory):
+    return path == directory or path.startswith(
+        os.path.join(directory, ''),
+    )
+
+
+class Manifest(object):
+    """Features by path relative to root, loaded from and saved to path
+
+    Each feature's entry holds its package and the directory that's imported
+    from, the mtime, size and digest of its file, and its scenarios' indexes,
+    names and tags.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.root, self.features = self.load()
+        self._by_name = None
+
+    def __bool__(self):
+        return bool(self.features)
+
+    __nonzero__ = __bool__
+
+    def load(self):
+        manifest = load_state(self.path, MANIFEST_FORMAT) or {}
+        return manifest.get('root'), manifest.get('features', {})
+
+    def save(self):
+        save_state(
+            self.path, MANIFEST_FORMAT,
+            {'root': self.root, 'features': self.features},
+        )
+
+    def build(self, root):
+        """Find the features under root, reusing the entries of those that
+        haven't changed
+
+        Returns the number of features read and parsed.
+        """
+        root = os.path.abspath(root)
+        previous = self.features if root == self.root else {}
+        features = {}
+        parsed = 0
+        for feature_path in find_features(root):
+            relative_path = os.path.relpath(feature_path, root)
+            feature_stat = os.stat(feature_path)
+            entry = previous.get(relative_path)
+            if (
+                entry is not None
+                and entry['mtime'] == feature_stat.st_mtime
+                and entry['size'] == feature_stat.st_size
+            ):
+                features[relative_path] = entry
+                continue
+
+            with io.open(feature_path, mode='rb') as feature_file:
+                data = feature_file.read()
+            digest = hashlib.sha1(data).hexdigest()
+            if entry is None or entry['digest'] != digest:
+                try:
+                    entry = make_entry(root, feature_path, data)
+                except Exception:
+                    log.warning('Could not add %s to the manifest',
+                                feature_path, exc_info=True)
+                    continue
+                parsed += 1
+            entry = dict(
+                entry,
+                mtime=feature_stat.st_mtime,
+                size=feature_stat.st_size,
+                digest=digest,
+            )
+            features[relative_path] = entry
+
+        self.root = root
+        self.features = features
+        self._by_name = None
+        return parsed
+
+    def feature_path(self, relative_path):
+        return os.path.join(self.root, relative_path)
+
+    def entry(self, feature_path):
+        """The entry of the feature at feature_path, or None"""
+        if self.root is None:
+            return None
+        return self.features.get(
+            os.path.relpath(os.path.abspath(feature_path), self.root),
+        )
+
+    def import_path(self, entry):
+        """The directory to import the package of entry from"""
+        return os.path.normpath(
+            os.path.join(self.root, entry['import_path']),
+        )
+
+    def is_current(self, feature_path, entry):
+        """Whether entry still describes the file at feature_path"""
+        try:
+            feature_stat = os.stat(feature_path)
+        except OSError:
+            return False
+        return (
+            entry['mtime'] == feature_stat.st_mtime
+            and entry['size'] == feature_stat.st_size
+        )
+
+    def find(self, package, filename):
+        """The path of the feature named package:filename, or None"""
+        if self._by_name is None:
+            self._by_name = {
+                (entry['package'], os.path.basename(relative_path)):
+                    self.feature_path(relative_path)
+                for relative_path, entry in self.features.items()
+            }
+        return self._by_name.get((package, filename))
+
+    def features_within(self, directory):
+        """Yield the path and entry of each feature under directory, in path
+        order"""
+        if self.root is None:
+            return
+        directory = os.path.abspath(directory)
+        for relative_path in sorted(self.features):
+            feature_path = self.feature_path(relative_path)
+            if is_within(feature_path, directory):
+                yield feature_path, self.features[relative_path]
+
+
+def make_entry(root, feature_path, data):
+    """Describe a feature for the manifest from its path and contents
+
+    import_path is the directory its package is imported from, relative to
+    root.
+    """
+    feature = parse_feature(read_feature_text(data))
+    package, import_path = name_from_path(os.path.dirname(feature_path))
+    return {
+        'package': package,
+        'import_path': os.path.relpath(import_path, root),
+        'scenarios': [
+            {
+                'index': scenario.index,
+                'name': scenario.name,
+                'tags': sorted(scenario.tags),
+            }
+            for scenario in feature.scenarios
+        ],
+    }
+
+
+def scenario_tags(entry):
+    """The tags of each scenario of a manifest entry, like
+    parsing.scan_scenario_tags"""
+    return [frozenset(scenario['tags']) for scenario in entry['scenarios']]
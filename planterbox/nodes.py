@@ -0,0 +1,124 @@
+"""Compact node classes describing a parsed feature.
+
+Nodes use __slots__ and immutable containers: large suites keep every parsed
+feature alive for the whole run. Anything derived from the text of a node,
+like a scenario's name without its keyword, is computed once when the node is
+created.
+"""
+
+
+class Node(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return '{}({})'.format(
+            self.__class__.__name__,
+            ', '.join(
+                '{}={!r}'.format(slot, getattr(self, slot))
+                for slot in self.all_slots()
+            ),
+        )
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, slot) == getattr(other, slot)
+            for slot in self.all_slots()
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    @classmethod
+    def all_slots(cls):
+        return [
+            slot
+            for klass in reversed(cls.__mro__)
+            for slot in getattr(klass, '__slots__', ())
+        ]
+
+
+class Step(Node):
+    """One step of a scenario.
+
+    text is the step's line as written, including indentation and any
+    multiline payload.
+    """
+    __slots__ = ('text', 'line')
+
+    def __init__(self, text, line=None):
+        self.text = text
+        self.line = line
+
+
+class ExamplesTable(Node):
+    """The examples of a scenario outline.
+
+    Either rows, the lines of a table written in the feature, or file, the
+    name of a csv file relative to the feature.
+    """
+    __slots__ = ('rows', 'file')
+
+    def __init__(self, rows=(), file=None):
+        self.rows = tuple(rows)
+        self.file = file
+
+    def __bool__(self):
+        return bool(self.rows) or self.file is not None
+
+    __nonzero__ = __bool__
+
+
+class Scenario(Node):
+    """A scenario from a feature.
+
+    text is the scenario's line as written; name is the text following
+    ``Scenario:`` and short_name that name without a trailing period.
+    """
+    __slots__ = ('index', 'text', 'name', 'short_name', 'steps', 'tags',
+                 'line')
+
+    examples = None
+
+    def __init__(self, index, text, steps, tags=(), line=None):
+        self.index = index
+        self.text = text
+        self.name = text.partition(':')[2].strip()
+        self.short_name = (
+            self.name[:-1] if self.name.endswith('.') else self.name
+        )
+        self.steps = tuple(steps)
+        self.tags = frozenset(tags)
+        self.line = line
+
+    @property
+    def step_texts(self):
+        return [step.text for step in self.steps]
+
+
+class Outline(Scenario):
+    """A scenario run once for each of its examples."""
+    __slots__ = ('examples',)
+
+    def __init__(self, index, text, steps, examples, tags=(), line=None):
+        super(Outline, self).__init__(index, text, steps, tags, line)
+        self.examples = examples
+
+
+class Feature(Node):
+    """A parsed feature.
+
+    header holds the lines before the first scenario as written; name and doc
+    are the feature's name and its stripped description lines.
+    """
+    __slots__ = ('header', 'name', 'doc', 'scenarios')
+
+    def __init__(self, header, scenarios):
+        self.header = tuple(header)
+        self.name = (
+            header[0].strip().replace('Feature:', '').strip()
+            if header else ''
+        )
+        self.doc = tuple(doc.strip() for doc in header[1:])
+        self.scenarios = tuple(scenarios)
@@ -3,6 +3,18 @@
 
 import re
 
+from six import (
+    string_types,
+)
+
+from .nodes import (
+    ExamplesTable,
+    Feature,
+    Outline,
+    Scenario,
+    Step,
+)
+
 INDENT = re.compile(r'^\s+')
 SCENARIO = re.compile(r'^\s+Scenario(?: Outline)?:')
 SCENARIO_TAG = re.compile(r'^\s+Scenario Tag:')
@@ -55,66 +67,167 @@ def skipline(line):
     return not stripped_line or stripped_line.startswith('#')
 
 
-def parse_feature(feature_text):
-    """Parse a feature
+def line_indent(line):
+    """Determine the indent level of a line, without regular expressions.
+
+    Like indent_level, but returns 0 for a line without leading whitespace.
+    """
+    whitespace = len(line) - len(line.lstrip())
+    return whitespace + 3 * line.count('\t', 0, whitespace)
 
-    Returning a simple data structure containing:
-    - One element containing all of the lines from feature name & advisory text
-    - One element containing a list of scenarios
-        - Each scenario is a list of lines of the scenario, including the name
+
+def feature_lines(feature):
+    """Iterate over the lines of feature text, a file or an iterable of lines
+
+    Lines are produced without their trailing newline.
     """
-    lines = feature_text.split('\n')
+    if isinstance(feature, string_types):
+        return iter(feature.split('\n'))
+    return (line[:-1] if line.endswith('\n') else line for line in feature)
+
+
+def scenario_tags(line):
+    """Split the tags out of a ``Scenario Tag:`` line"""
+    return line.replace(' ', '').split('ScenarioTag:')[1].split(',')
 
-    feature = []
+
+def scan_scenario_tags(feature):
+    """Find the tags of each scenario in a feature without parsing it
+
+    Follows parse_feature's rules for where scenarios start and end, but
+    keeps nothing else, so features can be filtered by tag cheaply. Returns a
+    frozenset of tags for each scenario, in order.
+    """
     scenarios = []
-    scenario = None
-    append_index = 1
-    scenario_tag_index = 3
+    tags = None
     scenario_indent = 0
     in_multiline = False
 
-    for line in lines:
-        if skipline(line):
+    for line in feature_lines(feature):
+        stripped = line.strip()
+        if not stripped or stripped[0] == '#':
             continue
 
-        if scenario is not None:
+        if tags is not None:
+            if stripped == '"""':
+                in_multiline = not in_multiline
+                continue
             if in_multiline:
-                if line.strip() == '"""':
-                    in_multiline = False
+                continue
+
+            if line_indent(line) <= scenario_indent:
+                scenarios.append(frozenset(tags))
+                tags = None
+            elif stripped.startswith('Scenario Tag:'):
+                tags.extend(scenario_tags(line))
+
+        if tags is None and line_indent(line) and (
+            stripped.startswith('Scenario:')
+            or stripped.startswith('Scenario Outline:')
+        ):
+            tags = []
+            scenario_indent = line_indent(line)
+
+    if tags is not None:
+        scenarios.append(frozenset(tags))
+    return scenarios
+
+
+def parse_feature(feature):
+    """Parse a feature
+
+    feature may be the text of a feature, an open file or any other iterable
+    of lines; lines are consumed one at a time.
+
+    Returns a planterbox.nodes.Feature.
+    """
+    header = []
+    scenarios = []
+    scenario = None
+    # The list steps or examples lines are currently being added to
+    append_to = None
+    step_lines = None
+    scenario_indent = 0
+    # Lines of the multiline step being read, or None outside of one
+    multiline = None
+    multiline_target = None
+
+    for line_number, line in enumerate(feature_lines(feature), 1):
+        stripped = line.strip()
+        if not stripped or stripped[0] == '#':
+            continue
+
+        if scenario is not None:
+            if multiline is not None:
+                if stripped == '"""':
+                    if multiline:
+                        multiline_target[-1] = '\n'.join(
+                            [multiline_target[-1]] + multiline)
+                    multiline = None
                 else:
-                    scenario[append_index][-1] += '\n' + line
+                    multiline.append(line)
                 continue
 
-            if line.strip() == '"""':
-                in_multiline = True
+            if stripped == '"""':
+                multiline = []
+                multiline_target = append_to
                 continue
 
-            line_indent = indent_level(line)
-            if line_indent <= scenario_indent:
+            indent = line_indent(line)
+            if indent <= scenario_indent:
                 scenario = None
                 scenario_indent = 0
-            elif starts_examples(line) or starts_examples_file(line):
-                append_index = 2
-                if starts_examples_file(line):
-                    scenario[2].append(line)
+            elif stripped.startswith('Examples:'):
+                append_to = scenario[2]
+            elif stripped.startswith('Examples file:'):
+                append_to = scenario[2]
+                append_to.append(line)
+            elif stripped.startswith('Scenario Tag:'):
+                scenario[3] += scenario_tags(line)
             else:
-                if starts_scenario_tag(line):
-                    scenario[scenario_tag_index] += list(
-                        line.replace(' ','').split('ScenarioTag:')[1].split(','))
-                    continue
-                else:
-                    scenario[append_index].append(line)
+                append_to.append(line)
+                if append_to is scenario[1]:
+                    step_lines.append(line_number)
 
         if scenario is None:  # Not elif - want to handle end-of-scenario
-            if starts_scenario(line):
-                scenario = [line, [], [], []]
-                append_index = 1
-                scenario_indent = indent_level(line)
+            if stripped.startswith('Scenario') and line_indent(line) and (
+                stripped.startswith('Scenario:')
+                or stripped.startswith('Scenario Outline:')
+            ):
+                step_lines = []
+                scenario = [line, [], [], [], line_number, step_lines]
+                append_to = scenario[1]
+                scenario_indent = line_indent(line)
                 scenarios.append(scenario)
             else:
-                feature.append(line)
+                header.append(line)
 
-    if in_multiline:
+    if multiline is not None:
         raise UnclosedMultilineStepError()
 
-    return feature, scenarios
+    return Feature(
+        header,
+        [make_scenario(index, *scenario)
+         for index, scenario in enumerate(scenarios)],
+    )
+
+
+def make_examples(examples):
+    """Build an ExamplesTable from the example lines of a scenario"""
+    if 'Examples file:' in examples[0]:
+        return ExamplesTable(
+            file=examples[1].strip() if len(examples) > 1 else '',
+        )
+    return ExamplesTable(rows=examples)
+
+
+def make_scenario(index, text, steps, examples, tags, line, step_lines):
+    """Build a Scenario or Outline node from the parts of a parsed scenario"""
+    steps = [
+        Step(step, step_line) for step, step_line in zip(steps, step_lines)
+    ]
+    if examples:
+        return Outline(
+            index, text, steps, make_examples(examples), tags, line,
+        )
+    return Scenario(index, text, steps, tags, line)
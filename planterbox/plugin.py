@@ -4,9 +4,13 @@ from collections import defaultdict
 import csv
 from datetime import datetime
 from functools import partial
+from importlib import import_module
+import io
 import logging
 import os
 import re
+import shutil
+import tempfile
 from unittest import (
     TestSuite,
 )
@@ -14,15 +18,80 @@ from unittest import (
 from nose2.events import (
     Plugin,
 )
+from nose2.plugins.mp import (
+    MultiProcess,
+)
 from nose2.util import (
+    ensure_importable,
     name_from_path,
     object_from_name,
     transplant_class,
 )
+from six import (
+    string_types,
+)
 
+from .aio import (
+    close_event_loops,
+)
+from .affected import (
+    Fingerprints,
+    STATE_FILE as FINGERPRINTS_FILE,
+)
+from .cache import (
+    cache_dir,
+    ParseCache,
+)
+from .exceptions import (
+    TagExpressionException,
+)
 from .feature import (
+    close_split_features,
     FeatureTestCase,
 )
+from . import (
+    history,
+    timing,
+)
+from .fixtures import (
+    close_fixtures,
+    log_teardown_errors,
+)
+from .history import (
+    DurationHistory,
+    HISTORY_FILE,
+)
+from .lastfailed import (
+    LastFailed,
+    scenario_ids,
+    STATE_FILE,
+)
+from .manifest import (
+    Manifest,
+    MANIFEST_FILE,
+    scenario_tags as manifest_scenario_tags,
+)
+from .parsing import (
+    scan_scenario_tags,
+)
+from .profiling import (
+    clear_profiles,
+    merge_profiles,
+)
+from .registry import (
+    match_cache_stats,
+    StepRegistry,
+)
+from .tags import (
+    compile_tags,
+)
+from .workers import (
+    claim_worker_id,
+    load_records,
+    run_callbacks,
+    save_records,
+    set_worker_id,
+)
 
 log = logging.getLogger('planterbox')
 
@@ -31,11 +100,30 @@ EXAMPLE_TO_FORMAT = re.compile(r'<(.+?)>')
 FEATURE_NAME = re.compile(r'\.feature(?:\:.+)?$')
 
 
+class PackageImportingSuite(TestSuite):
+    """A suite of features loaded from the manifest, which imports their
+    package when it runs, so that unittest finds its setUpModule and
+    tearDownModule"""
+
+    def run(self, result, debug=False):
+        try:
+            import_module(self.__module__)
+        except Exception:
+            pass  # Reported by each FeatureTestCase when it runs
+        return super(PackageImportingSuite, self).run(result, debug)
+
+
 class Planterbox(Plugin):
     configSection = 'planterbox'
     commandLineSwitch = (None, 'with-planterbox',
                          'Load tests from .feature files')
     checkOnly = False
+    splitScenarios = False
+    timing = False
+    lastFailedOnly = False
+    failedFirst = False
+    affectedOnly = False
+    manifestDiscovery = False
     tag_list=[]
 
     def __init__(self):
@@ -47,13 +135,101 @@ class Planterbox(Plugin):
             Don't run planterbox tests.""",
         )
 
+        self.addFlag(
+            self.setSplitScenarios, None, 'planterbox-split-scenarios',
+            help_text="""Make each scenario a separate test, so that
+            nose2.plugins.mp can distribute scenarios instead of features.""",
+        )
+        if self.config.as_bool('split-scenarios', False):
+            self.splitScenarios = True
+
+        self.addFlag(
+            self.setTiming, None, 'planterbox-timing',
+            help_text="""Time steps, hooks and scenarios, and report the
+            slowest with planterbox.summarize.""",
+        )
+        if self.config.as_bool('timing', False):
+            self.setTiming()
+        self.profileDir = None
+        if self.config.as_str('profile-dir', ''):
+            self.profileDir = os.path.abspath(
+                self.config.as_str('profile-dir', ''),
+            )
+        self.addArgument(
+            self.setProfileDir, None, 'planterbox-profile',
+            help_text="""Profile each scenario, writing its stats to
+            DIR/<feature id>-<scenario index>.pstats, and merge them into
+            DIR/suite.pstats.""",
+        )
+
+        self.durationHistory = None
+        if self.config.as_bool('duration-history', False):
+            history.enable()
+            self.durationHistory = DurationHistory(
+                os.path.join(cache_dir(self.config), HISTORY_FILE),
+            )
+
+        self.addFlag(
+            self.setLastFailed, None, 'planterbox-last-failed',
+            help_text="""Only run the scenarios that failed last time, or
+            everything if none did.""",
+        )
+        self.addFlag(
+            self.setFailedFirst, None, 'planterbox-failed-first',
+            help_text="""Run features with scenarios that failed last time
+            first.""",
+        )
+        self.addFlag(
+            self.setAffected, None, 'planterbox-affected',
+            help_text="""Only run the scenarios that changed, or whose steps
+            or hooks changed, since they last passed.""",
+        )
+        self.lastFailed = None
+        self.fingerprints = None
+        self.recordFailures = self.config.as_bool('record-failures', False)
+        self.ranScenarios = set()
+        self.failedScenarios = set()
+
+        # Set in nose2.plugins.mp workers by registerInSubprocess
+        self.inSubprocess = self.config.as_bool('in-subprocess', False)
+        self.workerDir = self.config.as_str('worker-dir', '') or None
+        self.workerSetup = self.config.as_list('worker-setup', [])
+        self.workerTeardown = self.config.as_list('worker-teardown', [])
+        # Whether this process is the only worker, without nose2.plugins.mp
+        self.soleWorker = False
+
         self.addOption(
             self.tag_list, None, 'tag',
             help_text="""tag allows selective running of scenarios
-            Examples: tag=abc or tag=abc,def""",
+            Examples: tag=abc or tag=abc,def or tag="abc and not slow".""",
             nargs=1
         )
-        
+        # The --tag expressions, compiled once the arguments are parsed
+        self.tagExpression = None
+        # Tags of each feature's scenarios by path, from scan_scenario_tags
+        self.featureTags = {}
+
+        self.manifest = None
+        if self.config.as_bool('manifest', False):
+            self.manifest = Manifest(
+                os.path.join(cache_dir(self.config), MANIFEST_FILE),
+            )
+        self.addFlag(
+            self.setManifestDiscovery, None, 'planterbox-manifest-discovery',
+            help_text="""Discover features from the manifest built by
+            python -m planterbox manifest, instead of walking the start
+            directory. Other tests in it aren't discovered.""",
+        )
+        if self.config.as_bool('manifest-discovery', False):
+            self.setManifestDiscovery()
+
+        if self.config.as_bool('parse-cache', False):
+            self.parse_cache = ParseCache(
+                os.path.join(cache_dir(self.config), 'parse'),
+            )
+        else:
+            self.parse_cache = None
+
         
     def register(self):
         super(Planterbox, self).register()
@@ -74,31 +250,315 @@ class Planterbox(Plugin):
     def setCheckOnly(self, *args):
         self.checkOnly = True
 
+    def setSplitScenarios(self, *args):
+        self.splitScenarios = True
+
+    def setTiming(self, *args):
+        self.timing = True
+        timing.enable()
+
+    def setLastFailed(self, *args):
+        self.lastFailedOnly = True
+        self.recordFailures = True
+
+    def setFailedFirst(self, *args):
+        self.failedFirst = True
+        self.recordFailures = True
+
+    def setManifestDiscovery(self, *args):
+        self.manifestDiscovery = True
+        if self.manifest is None:
+            self.manifest = Manifest(
+                os.path.join(cache_dir(self.config), MANIFEST_FILE),
+            )
+
+    def current_manifest_entry(self, feature_path):
+        """The manifest's entry for the feature at feature_path, if it still
+        describes the file, prepared with use_manifest_entry; otherwise
+        None"""
+        if not self.manifest:
+            return None
+        entry = self.manifest.entry(feature_path)
+        if entry is None or not self.manifest.is_current(feature_path, entry):
+            return None
+        self.use_manifest_entry(feature_path, entry)
+        return entry
+
+    def use_manifest_entry(self, feature_path, entry):
+        """Prepare to load a feature described by the manifest, without
+        importing its package or reading it"""
+        ensure_importable(self.manifest.import_path(entry))
+        self.featureTags.setdefault(
+            feature_path, manifest_scenario_tags(entry),
+        )
+
+    def setAffected(self, *args):
+        self.affectedOnly = True
+        self.recordFailures = True
+
+    def get_fingerprints(self):
+        """Load the fingerprints of the scenarios that passed last time"""
+        if self.fingerprints is None:
+            self.fingerprints = Fingerprints(
+                os.path.join(cache_dir(self.config), FINGERPRINTS_FILE),
+            )
+        return self.fingerprints
+
+    def get_last_failed(self):
+        """Load the failed scenarios of the last run, if they're needed"""
+        if self.lastFailed is None and (self.lastFailedOnly or self.failedFirst):
+            self.lastFailed = LastFailed(
+                os.path.join(cache_dir(self.config), STATE_FILE),
+            )
+        return self.lastFailed
+
+    def setTestOutcome(self, event):
+        """Note which scenarios an outcome is for, while the test still knows
+
+        Under nose2.plugins.mp this runs in the worker; the main process gets
+        the scenario ids in the event's metadata.
+        """
+        if (
+            self.recordFailures
+            and isinstance(event.test, FeatureTestCase)
+            and 'planterbox_scenarios' not in event.metadata
+        ):
+            event.metadata['planterbox_scenarios'] = scenario_ids(
+                event.test, event.exc_info,
+            )
+
+    def testOutcome(self, event):
+        scenarios = event.metadata.get('planterbox_scenarios')
+        if not scenarios:
+            return
+        self.ranScenarios.update(scenarios)
+        if event.outcome in ('failed', 'error') and not event.expected:
+            self.failedScenarios.update(scenarios)
+
+    def setProfileDir(self, directory):
+        self.profileDir = os.path.abspath(directory[0])
+
+    def startTestRun(self, event):
+        if self.profileDir and not self.inSubprocess:
+            clear_profiles(self.profileDir)
+            if self.config.as_int('scenario-threads', 0) > 1:
+                log.warning('planterbox runs scenarios one at a time while '
+                            'profiling; scenario-threads is ignored')
+        if not self.uses_workers():
+            self.soleWorker = True
+            self.start_worker(0)
+
+    def uses_workers(self):
+        """Whether nose2.plugins.mp will run the tests in worker processes"""
+        return any(
+            isinstance(plugin, MultiProcess) and plugin.registered
+            for plugin in self.session.plugins
+        )
+
+    def start_worker(self, worker_id):
+        set_worker_id(worker_id)
+        run_callbacks(self.workerSetup, 'worker-setup')
+
+    def stop_worker(self):
+        """Tear down session fixtures and call worker-teardown callbacks"""
+        log_teardown_errors(close_fixtures())
+        run_callbacks(self.workerTeardown, 'worker-teardown')
+        set_worker_id(None)
+
+    def startSubprocess(self, event):
+        """Set up a nose2.plugins.mp worker, once before its first test"""
+        worker_id = 0
+        if self.workerDir:
+            worker_id = claim_worker_id(self.workerDir)
+        self.start_worker(worker_id)
+
+    def stopSubprocess(self, event):
+        """Tear down a nose2.plugins.mp worker after its last test; workers
+        exit without running atexit handlers"""
+        close_split_features()
+        if self.workerDir:
+            save_records(self.workerDir, {
+                key: timings.drain()
+                for key, timings in self.carried_timings()
+            })
+        self.stop_worker()
+        close_event_loops()
+
+    def afterTestRun(self, event):
+        close_split_features(event.result)
+        if self.soleWorker:
+            self.stop_worker()
+        else:
+            log_teardown_errors(close_fixtures())
+        if self.workerDir and not self.inSubprocess:
+            for records in load_records(self.workerDir):
+                for key, timings in self.carried_timings():
+                    timings.update(records.get(key, ()))
+            shutil.rmtree(self.workerDir, ignore_errors=True)
+        if self.recordFailures:
+            last_failed = LastFailed(
+                os.path.join(cache_dir(self.config), STATE_FILE),
+            )
+            last_failed.update(self.ranScenarios, self.failedScenarios)
+            last_failed.save()
+        if self.fingerprints is not None:
+            self.fingerprints.update(self.ranScenarios, self.failedScenarios)
+            self.fingerprints.save()
+        if self.durationHistory is not None:
+            self.durationHistory.update(history.observed.drain())
+            self.durationHistory.save()
+        if self.profileDir:
+            merged_path = merge_profiles(self.profileDir)
+            if merged_path is not None:
+                log.info('planterbox profile written to %s', merged_path)
+
+    def carried_timings(self):
+        """List (key, timings) for the timings and durations being recorded,
+        which nose2.plugins.mp workers carry to the main process"""
+        return [
+            (key, timings)
+            for key, timings in (
+                ('planterbox_timings', timing.active()),
+                ('planterbox_durations', history.active()),
+            )
+            if timings is not None
+        ]
+
+    def stopTest(self, event):
+        """Carry timings and durations from nose2.plugins.mp workers to the
+        main process"""
+        for key, timings in self.carried_timings():
+            if self.inSubprocess:
+                event.metadata[key] = timings.drain()
+            elif key in event.metadata:
+                timings.update(event.metadata[key])
+
+    def createdTestSuite(self, event):
+        if self.inSubprocess:
+            return
+        if self.durationHistory is not None:
+            self.durationHistory.sort_suite(event.suite)
+        if self.failedFirst and self.get_last_failed():
+            self.lastFailed.sort_suite(event.suite)
+
+    def afterSummaryReport(self, event):
+        if self.config.as_int('match-cache-size', 0) > 0:
+            hits, misses = match_cache_stats()
+            event.stream.write(
+                'planterbox step match cache: {} hits, {} misses\n'.format(
+                    hits, misses,
+                ),
+            )
+
+
+    def handleArgs(self, event):
+        """Compile the --tag expressions, rejecting a malformed one before
+        any test is loaded"""
+        try:
+            self.tagExpression = compile_tags(self.tag_list)
+        except TagExpressionException as e:
+            self.session.argparse.error('--tag: {}'.format(e))
+
+    def get_tag_expression(self):
+        """The compiled --tag expressions; None if there are none"""
+        if self.tagExpression is None:
+            self.tagExpression = compile_tags(self.tag_list)
+        return self.tagExpression
+
+    def has_tagged_scenarios(self, feature_path):
+        """Whether any scenario of a feature matches the --tag expressions,
+        from a scan of its tags that doesn't import or parse anything"""
+        tag_expression = self.get_tag_expression()
+        if tag_expression is None:
+            return True
+        if feature_path not in self.featureTags:
+            try:
+                with io.open(feature_path, encoding='utf-8') as feature_file:
+                    self.featureTags[feature_path] = scan_scenario_tags(
+                        feature_file,
+                    )
+            except (IOError, OSError, ValueError):
+                return True  # Let the feature's own loading report it
+        return tag_expression.matches_any(self.featureTags[feature_path])
 
     def makeSuiteFromFeature(self, module, feature_path,
                              scenarios_to_run=None):
-        MyTestSuite = transplant_class(TestSuite, module.__name__)
+        """Make a suite of a feature in module, the feature's package
+
+        module may instead be the package's name, for features loaded from
+        the manifest: the package is then imported when the feature runs.
+        """
+        if isinstance(module, string_types):
+            module_name = module
+            step_registry = None
+            MyTestSuite = transplant_class(PackageImportingSuite, module_name)
+        else:
+            module_name = module.__name__
+            step_registry = StepRegistry.for_module(module)
+            MyTestSuite = transplant_class(TestSuite, module_name)
+
+        if not self.has_tagged_scenarios(feature_path):
+            return MyTestSuite(tests=[])
+
+        MyFeatureTestCase = transplant_class(FeatureTestCase, module_name)
 
-        MyFeatureTestCase = transplant_class(FeatureTestCase, module.__name__)
+        failed = None
+        if self.lastFailedOnly and self.get_last_failed():
+            failed = self.lastFailed.failed_scenarios('{}:{}'.format(
+                module_name, os.path.basename(feature_path),
+            ))
+            if failed is None:
+                return MyTestSuite(tests=[])
 
         if self.checkOnly:
-            MyFeatureTestCase(
+            test = MyFeatureTestCase(
                 feature_path=feature_path,
                 scenarios_to_run=scenarios_to_run,
                 config=self.config,
+                step_registry=step_registry,
+                parse_cache=self.parse_cache,
             )
+            if not failed or self.only_failed(test, failed):
+                test.check_scenarios()
             return MyTestSuite(tests=[])
         else:
-            return MyTestSuite(
-                tests=[
-                    MyFeatureTestCase(
-                        feature_path=feature_path,
-                        scenarios_to_run=scenarios_to_run,
-                        config=self.config,
-                        tag_list=self.tag_list,
-                    ),
-                ],
+            test = MyFeatureTestCase(
+                feature_path=feature_path,
+                scenarios_to_run=scenarios_to_run,
+                config=self.config,
+                tag_list=self.get_tag_expression(),
+                step_registry=step_registry,
+                parse_cache=self.parse_cache,
+                profile_dir=self.profileDir,
             )
+            if failed and not self.only_failed(test, failed):
+                return MyTestSuite(tests=[])
+            if self.affectedOnly:
+                affected = self.get_fingerprints().affected_scenarios(test)
+                if not affected:
+                    return MyTestSuite(tests=[])
+                if affected != {s.index for s in test.selected_scenarios()}:
+                    test.scenarios_to_run = affected
+            if self.splitScenarios:
+                tests = test.split_scenarios(keep_open=self.inSubprocess)
+                if self.durationHistory is not None:
+                    tests = self.durationHistory.longest_first(tests)
+                if self.failedFirst and self.get_last_failed():
+                    tests = self.lastFailed.failed_first(tests)
+                return MyTestSuite(tests=tests)
+            return MyTestSuite(tests=[test])
+
+    def only_failed(self, test, failed):
+        """Narrow the scenarios of a FeatureTestCase to those whose indexes
+        are in failed, returning whether any are left
+
+        Scenarios named to run may be named by index or by name, so they're
+        resolved through selected_scenarios before comparing.
+        """
+        test.scenarios_to_run = {
+            scenario.index for scenario in test.selected_scenarios()
+        } & failed
+        return bool(test.scenarios_to_run)
 
     def handleFile(self, event):
         """Produce a FeatureTestSuite from a .feature file."""
@@ -107,22 +567,78 @@ class Planterbox(Plugin):
             return
 
         event.handled = True
+        return self.load_feature(feature_path, event.loader)
+
+    def load_feature(self, feature_path, loader):
+        """Make a suite of the feature at feature_path, from its manifest
+        entry if that's current, or else by importing its package; None if
+        none of its scenarios are tagged for this run"""
+        entry = self.current_manifest_entry(feature_path)
+        if not self.has_tagged_scenarios(feature_path):
+            return None
+
+        if entry is not None:
+            return self.makeSuiteFromFeature(
+                module=entry['package'],
+                feature_path=feature_path,
+            )
 
         try:
             feature_package_name = name_from_path(
                 os.path.dirname(feature_path))[0]
             feature_module = object_from_name(feature_package_name)[1]
         except Exception:
-            return event.loader.failedImport(feature_path)
+            return loader.failedImport(feature_path)
 
         return self.makeSuiteFromFeature(
             module=feature_module,
             feature_path=feature_path,
         )
 
+    def handleDir(self, event):
+        """With --planterbox-manifest-discovery, load the manifest's features
+        under a directory instead of walking it"""
+        if not self.manifestDiscovery:
+            return
+        if not self.manifest:
+            log.warning(
+                'No feature manifest in %s; discovering features by walking '
+                'directories. Build one with python -m planterbox manifest.',
+                self.manifest.path,
+            )
+            self.manifestDiscovery = False
+            return
+
+        event.handled = True
+        suites = []
+        for feature_path, entry in self.manifest.features_within(event.path):
+            if not os.path.isfile(feature_path):
+                continue  # Deleted since the manifest was built
+            suite = self.load_feature(feature_path, event.loader)
+            if suite is not None:
+                suites.append(suite)
+        return event.loader.suiteClass(suites)
+
     def registerInSubprocess(self, event):
         event.pluginClasses.insert(0, self.__class__)
 
+        # Workers are configured from the session's config alone.
+        config = self.session.config
+        if not config.has_section(self.configSection):
+            config.add_section(self.configSection)
+        config.set(self.configSection, 'in-subprocess', 'True')
+        if self.splitScenarios:
+            config.set(self.configSection, 'split-scenarios', 'True')
+        if self.timing:
+            config.set(self.configSection, 'timing', 'True')
+        if self.profileDir:
+            config.set(self.configSection, 'profile-dir', self.profileDir)
+        if self.recordFailures:
+            config.set(self.configSection, 'record-failures', 'True')
+        # Workers claim their ids by creating files here
+        self.workerDir = tempfile.mkdtemp(prefix='planterbox-workers-')
+        config.set(self.configSection, 'worker-dir', self.workerDir)
+
     def loadTestsFromNames(self, event):
         is_feature = partial(FEATURE_NAME.search)
         feature_names = [test_name for test_name in event.names if
@@ -149,22 +665,41 @@ class Planterbox(Plugin):
         return features[0]
 
     def _from_names(self, names):
+        """Make a suite for each feature named, in name order or, with
+        duration-history, longest first"""
         by_feature = normalize_names(names)
 
+        suites = []
         for (
             feature_package_name, feature_filename,
         ), scenarios_to_run in sorted(by_feature.items()):
-            feature_module = object_from_name(feature_package_name)[1]
-            feature_path = os.path.join(
-                os.path.dirname(feature_module.__file__), feature_filename,
-            )
-
-            suite = self.makeSuiteFromFeature(
+            feature_path = None
+            if self.manifest:
+                feature_path = self.manifest.find(
+                    feature_package_name, feature_filename,
+                )
+            if feature_path is not None and self.current_manifest_entry(
+                feature_path,
+            ) is not None:
+                feature_module = feature_package_name
+            else:
+                feature_module = object_from_name(feature_package_name)[1]
+                feature_path = os.path.join(
+                    os.path.dirname(feature_module.__file__),
+                    feature_filename,
+                )
+
+            suites.append(self.makeSuiteFromFeature(
                 module=feature_module,
                 feature_path=feature_path,
                 scenarios_to_run=scenarios_to_run,
-            )
-            yield suite
+            ))
+
+        if self.durationHistory is not None:
+            suites = self.durationHistory.longest_first(suites)
+        if self.failedFirst and self.get_last_failed():
+            suites = self.lastFailed.failed_first(suites)
+        return suites
 
 
 def normalize_names(names):
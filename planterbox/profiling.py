@@ -0,0 +1,88 @@
+"""Profiling scenarios with cProfile.
+
+With ``--planterbox-profile DIR``, every scenario, and every example of a
+scenario outline, runs under its own profiler, and its stats are written to
+DIR as ``<feature id>-<hash>-<scenario index>[-<example index>].pstats``,
+where the hash of the feature id keeps apart features whose ids only differ
+in characters that can't go in a file name. When the run is over, the stats
+of all the scenarios are merged into ``DIR/suite.pstats``. Only steps and
+scenario and step hooks are profiled, not test discovery or nose2 itself.
+
+cProfile can't profile several threads at once on recent versions of
+python, so features run their scenarios one at a time while profiling, even
+with ``scenario-threads``.
+
+Look at the results with ``python -m pstats DIR/suite.pstats``.
+"""
+
+import cProfile
+from contextlib import (
+    contextmanager,
+)
+import glob
+import hashlib
+import logging
+import os
+import pstats
+import re
+
+log = logging.getLogger('planterbox')
+
+MERGED_PROFILE = 'suite.pstats'
+UNSAFE_CHARACTERS = re.compile(r'[^\w.-]+')
+
+
+def profile_path(directory, feature_id, scenario_index, example_index=None):
+    """Name the stats file of a scenario or an example of an outline"""
+    parts = [
+        UNSAFE_CHARACTERS.sub('-', feature_id),
+        hashlib.sha1(feature_id.encode('utf-8')).hexdigest()[:8],
+        str(scenario_index),
+    ]
+    if example_index is not None:
+        parts.append(str(example_index))
+    return os.path.join(directory, '-'.join(parts) + '.pstats')
+
+
+@contextmanager
+def profiling(path):
+    """Profile the body of the with statement, writing stats to path"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def clear_profiles(directory):
+    """Remove the stats files of a previous run, creating directory if
+    needed"""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for path in glob.glob(os.path.join(directory, '*.pstats')):
+        os.unlink(path)
+
+
+def merge_profiles(directory):
+    """Merge the stats of every profiled scenario into one file
+
+    Returns the path of the merged file, or None if nothing was profiled.
+    """
+    merged_path = os.path.join(directory, MERGED_PROFILE)
+    paths = sorted(
+        path for path in glob.glob(os.path.join(directory, '*.pstats'))
+        if path != merged_path
+    )
+    if not paths:
+        return None
+
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        try:
+            stats.add(path)
+        except Exception:
+            log.warning('Could not merge profile %s', path, exc_info=True)
+    stats.dump_stats(merged_path)
+    return merged_path
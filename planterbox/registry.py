@@ -0,0 +1,159 @@
+"""Per-package inventory of steps, hooks and fixtures, shared by every feature
+in the package.
+
+Harvesting steps and hooks means walking every attribute of a feature's
+package. The result only changes when the package does, so it is computed once
+per module and reused until the module, or a module its steps, hooks or
+fixtures come from, is reloaded or explicitly invalidated.
+"""
+
+from collections import (
+    defaultdict,
+)
+import os
+import sys
+
+from .dispatch import (
+    MatchCache,
+    StepDispatcher,
+)
+
+_registries = {}
+
+
+def harvest_steps(module):
+    """Find all steps that have been imported into a module"""
+    return [
+        maybe_step
+        for maybe_step in [getattr(module, name) for name in dir(module)]
+        if (
+            hasattr(maybe_step, '__call__')
+            and hasattr(maybe_step, 'planterbox_patterns')
+        )
+    ]
+
+
+def harvest_hooks(module):
+    """Find all hooks in a module, grouped by (timing, stage)"""
+    hooks = defaultdict(list)
+    for symbol in dir(module):
+        maybe_hook = getattr(module, symbol)
+        maybe_hook_timing = getattr(maybe_hook, 'planterbox_hook_timing', set())
+        if (
+            hasattr(maybe_hook, '__call__')
+            and hasattr(maybe_hook_timing, '__iter__')
+        ):
+            for timing_stage in maybe_hook_timing:
+                hooks[timing_stage].append(maybe_hook)
+    return {
+        timing_stage: tuple(stage_hooks)
+        for timing_stage, stage_hooks in hooks.items()
+    }
+
+
+def harvest_fixtures(module):
+    """Find all fixtures in a module, by name"""
+    return {
+        maybe_fixture.planterbox_fixture_name: maybe_fixture
+        for maybe_fixture in [getattr(module, name) for name in dir(module)]
+        if (
+            hasattr(maybe_fixture, '__call__')
+            and hasattr(maybe_fixture, 'planterbox_fixture_scope')
+        )
+    }
+
+
+class StepRegistry(object):
+    """The steps, hooks and fixtures available to the features in one
+    package."""
+
+    def __init__(self, module):
+        self.module = module
+        self.steps = harvest_steps(module)
+        self.dispatcher = StepDispatcher(self.steps)
+        self.hooks = harvest_hooks(module)
+        self.fixtures = harvest_fixtures(module)
+        self.match_cache = None
+        self.sources = self.find_sources()
+
+    @classmethod
+    def for_module(cls, module):
+        """Get the registry for module, harvesting it if necessary"""
+        registry = _registries.get(module.__name__)
+        if registry is None or not registry.is_current(module):
+            registry = _registries[module.__name__] = cls(module)
+        return registry
+
+    def get_match_cache(self, maxsize):
+        """Get the memo of step matches for this package, creating it if
+        necessary"""
+        if self.match_cache is None:
+            self.match_cache = MatchCache(self.dispatcher, maxsize)
+        return self.match_cache
+
+    def find_sources(self):
+        """Stamp the package and every module its steps, hooks and fixtures
+        are defined in, by name"""
+        callables = list(self.steps) + list(self.fixtures.values())
+        for stage_hooks in self.hooks.values():
+            callables.extend(stage_hooks)
+
+        sources = {self.module.__name__: self.module}
+        for fn in callables:
+            source = sys.modules.get(getattr(fn, '__module__', None))
+            if source is not None:
+                sources[source.__name__] = source
+        return {
+            name: (source, source_mtime(source))
+            for name, source in sources.items()
+        }
+
+    def is_current(self, module):
+        """Determine whether this registry still describes module.
+
+        Reloading keeps the module object, so a reload is detected by the
+        modification time of the source of the package, or of a module its
+        steps, hooks or fixtures come from, having changed since they were
+        harvested.
+        """
+        if module is not self.module:
+            return False
+        for name, (source, mtime) in self.sources.items():
+            if sys.modules.get(name) is not source:
+                return False
+            if source_mtime(source) != mtime:
+                return False
+        return True
+
+
+def source_mtime(module):
+    """The modification time of a module's source file, or None"""
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    if path.endswith(('.pyc', '.pyo')) and os.path.exists(path[:-1]):
+        path = path[:-1]  # Python 2 points __file__ at the compiled file
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def invalidate(module=None):
+    """Forget the registry for module, or for every module if None"""
+    if module is None:
+        _registries.clear()
+    else:
+        _registries.pop(module.__name__, None)
+
+
+def match_cache_stats():
+    """Total hits and misses of the match caches of every package"""
+    caches = [
+        registry.match_cache for registry in _registries.values()
+        if registry.match_cache is not None
+    ]
+    return (
+        sum(cache.hits for cache in caches),
+        sum(cache.misses for cache in caches),
+    )
@@ -19,6 +19,12 @@ class PlanterboxSummary(Plugin):
         ('errors', 'Errors'),
     )
 
+    TIMING_HEADERS = (
+        ('step', 'Slowest Steps'),
+        ('scenario', 'Slowest Scenarios'),
+        ('hook', 'Slowest Hooks'),
+    )
+
     def beforeSummaryReport(self, event):
         from planterbox.feature import FeatureTestCase, FeatureExcInfo
 
@@ -33,6 +39,27 @@ class PlanterboxSummary(Plugin):
             event.stream.write(header + '\n' + '=' * len(header) + '\n')
             self.summarize_features(event, reportable_results)
 
+        self.summarize_timings(event)
+
+    def summarize_timings(self, event):
+        """Report the slowest steps, scenarios and hooks, if they were timed
+        with --planterbox-timing"""
+        from planterbox.timing import timings
+
+        slowest = self.config.as_int('slowest', 10)
+        for kind, header in self.TIMING_HEADERS:
+            records = timings.slowest(kind, slowest)
+            if not records:
+                continue
+            event.stream.write(header + '\n' + '=' * len(header) + '\n')
+            for label, count, total, longest in records:
+                event.stream.write(
+                    '{:9.3f}s total {:5d} runs {:9.3f}s longest  {}\n'.format(
+                        total, count, longest, label,
+                    ),
+                )
+            event.stream.write('\n')
+
     def summarize_features(self, event, reportable_results):
         grouped_features = groupby(
             sorted(
@@ -42,14 +69,16 @@ class PlanterboxSummary(Plugin):
                     r.exc_info.scenario_index,
                 )),
             ),
-            (lambda r: r.test),
+            (lambda r: r.test.feature_id()),
         )
-        for test, results in grouped_features:
-            event.stream.write('Feature: ' + test.feature_name + '\n')
+        for feature_id, results in grouped_features:
+            results = list(results)
+            event.stream.write(
+                'Feature: ' + results[0].test.feature_name + '\n')
             for result in results:
                 event.stream.write('{}\n  {}:{}\n'.format(
                     result.exc_info.scenario_name.strip(),
-                    test.feature_id(),
+                    feature_id,
                     result.exc_info.scenario_index,
                 ))
             event.stream.write('\n')
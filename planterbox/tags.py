@@ -0,0 +1,160 @@
+"""Tag expressions for selecting scenarios with ``--tag``.
+
+An expression combines tag names with ``and``, ``or``, ``not`` and
+parentheses, like ``smoke and not slow`` or ``(db or api) and not flaky``.
+A comma is another way to write ``or``, so ``--tag abc,def`` still selects
+scenarios tagged either ``abc`` or ``def``. When ``--tag`` is given more than
+once, a scenario must match every expression. Tag names may be written with
+a leading ``@``.
+
+Expressions are compiled once into a function of a scenario's tags; see
+compile_tags.
+"""
+
+import re
+
+from .exceptions import (
+    TagExpressionException,
+)
+
+TOKEN = re.compile(r'\s*(\(|\)|,|[^\s(),]+)')
+KEYWORDS = ('and', 'or', 'not')
+
+_compiled = {}
+
+
+class TagExpression(object):
+    """A compiled tag expression
+
+    matches(tags) decides whether a scenario with tags is selected; tags
+    holds every tag name the expression mentions.
+    """
+
+    def __init__(self, text, matches, tags):
+        self.text = text
+        self.matches = matches
+        self.tags = frozenset(tags)
+
+    def __repr__(self):
+        return 'TagExpression({!r})'.format(self.text)
+
+    def matches_any(self, scenario_tags):
+        """Whether any of a sequence of scenarios' tags match"""
+        return any(self.matches(tags) for tags in scenario_tags)
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class Parser(object):
+    """Recursive descent parser turning tokens into nested closures"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.tags = set()
+
+    def error(self, message):
+        return TagExpressionException(
+            'Invalid tag expression {!r}: {}'.format(self.text, message),
+        )
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise self.error('empty')
+        matches = self.parse_or()
+        if self.peek() is not None:
+            raise self.error('unexpected {!r}'.format(self.peek()))
+        return matches
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() in ('or', ','):
+            self.take()
+            operands.append(self.parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda tags: any(operand(tags) for operand in operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek() == 'and':
+            self.take()
+            operands.append(self.parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda tags: all(operand(tags) for operand in operands)
+
+    def parse_not(self):
+        token = self.take()
+        if token == 'not':
+            operand = self.parse_not()
+            return lambda tags: not operand(tags)
+        if token == '(':
+            matches = self.parse_or()
+            if self.take() != ')':
+                raise self.error('missing )')
+            return matches
+        if token is None or token in KEYWORDS or token in (')', ','):
+            raise self.error(
+                'expected a tag, found {}'.format(
+                    'the end' if token is None else repr(token),
+                ),
+            )
+
+        tag = token.lstrip('@')
+        self.tags.add(tag)
+        return lambda tags: tag in tags
+
+
+def compile_tag_expression(text):
+    """Compile one tag expression into a TagExpression"""
+    parser = Parser(text)
+    matches = parser.parse()
+    return TagExpression(text, matches, parser.tags)
+
+
+def compile_tags(tag_list):
+    """Compile the --tag expressions in tag_list into one TagExpression, or
+    None if there are none
+
+    Compiled expressions are remembered, so each distinct list of expressions
+    is only compiled once.
+    """
+    if tag_list is None or isinstance(tag_list, TagExpression):
+        return tag_list
+    key = tuple(tag_list)
+    if not key:
+        return None
+    if key not in _compiled:
+        expressions = [compile_tag_expression(text) for text in key]
+        if len(expressions) == 1:
+            _compiled[key] = expressions[0]
+        else:
+            _compiled[key] = TagExpression(
+                ' and '.join('({})'.format(text) for text in key),
+                lambda tags: all(
+                    expression.matches(tags) for expression in expressions
+                ),
+                set().union(*(expression.tags for expression in expressions)),
+            )
+    return _compiled[key]
@@ -0,0 +1,143 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from planterbox import (
+    step,
+)
+from planterbox.affected import (
+    Fingerprints,
+    function_fingerprint,
+    STATE_FILE,
+)
+from planterbox.plugin import (
+    Planterbox,
+)
+
+BASIC = 'planterbox.tests.test_feature:basic.feature'
+EXAMPLES = 'planterbox.tests.test_feature:examples.feature'
+
+
+def make_step(pattern):
+    @step(pattern)
+    def test_step(test):
+        return 1
+
+    return test_step
+
+
+def make_other_step(pattern):
+    @step(pattern)
+    def test_step(test):
+        return 2
+
+    return test_step
+
+
+class TestFunctionFingerprint(unittest.TestCase):
+    def test_stable(self):
+        self.assertEqual(
+            function_fingerprint(make_step(r'I do')),
+            function_fingerprint(make_step(r'I do')),
+        )
+
+    def test_changes(self):
+        fingerprint = function_fingerprint(make_step(r'I do'))
+        self.assertNotEqual(
+            fingerprint, function_fingerprint(make_other_step(r'I do')),
+        )
+        self.assertNotEqual(
+            fingerprint, function_fingerprint(make_step(r'I did')),
+        )
+
+
+class TestAffected(unittest.TestCase):
+    def setUp(self):
+        plugin_patcher = mock.patch.multiple(
+            'planterbox.plugin.Planterbox',
+            # Short-circuit nose2 attempting to register this instance
+            addOption=mock.DEFAULT,
+            addFlag=mock.DEFAULT,
+        )
+        plugin_patcher.start()
+        self.addCleanup(plugin_patcher.stop)
+
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        self.path = os.path.join(work_dir, STATE_FILE)
+
+    def load(self):
+        pp = Planterbox()
+        pp.setAffected()
+        pp.fingerprints = Fingerprints(self.path)
+        return pp, pp._from_names([BASIC])[0]
+
+    def test_affected(self):
+        pp, suite = self.load()
+        self.assertEqual(suite._tests[0].id(), BASIC)
+
+        pp.fingerprints.update(
+            ran=[BASIC + ':0', BASIC + ':1'], failed=[BASIC + ':1'],
+        )
+        pp.fingerprints.save()
+        pp, suite = self.load()
+        self.assertEqual(suite._tests[0].scenarios_to_run, {1})
+
+        pp.fingerprints.update(ran=[BASIC + ':1'], failed=[])
+        pp.fingerprints.save()
+        pp, suite = self.load()
+        self.assertEqual(suite._tests, [])
+
+    def test_changed_step(self):
+        changed = set()
+        patcher = mock.patch(
+            'planterbox.affected.function_fingerprint',
+            lambda fn: fn.__name__ + ('-changed' if fn in changed else ''),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        pp, suite = self.load()
+        pp.fingerprints.update(ran=[BASIC + ':0', BASIC + ':1'], failed=[])
+        pp.fingerprints.save()
+
+        changed.update(
+            fn for fn in pp.get_fingerprints()._functions
+            if fn.__name__ == 'add'
+        )
+        pp, suite = self.load()
+        self.assertEqual(suite._tests[0].scenarios_to_run, {0})
+
+    def test_outline_examples_source(self):
+        pp = Planterbox()
+        test = pp._from_names([EXAMPLES])[0]._tests[0]
+        fingerprints = Fingerprints(self.path)
+        hooks_fingerprint = fingerprints.hooks_fingerprint(test.step_registry)
+        csv_outline = test.scenarios[1]
+
+        with mock.patch.object(test, 'load_examples',
+                               side_effect=AssertionError('loaded')):
+            fingerprint = fingerprints.scenario_fingerprint(
+                test, csv_outline, hooks_fingerprint,
+            )
+        self.assertEqual(
+            fingerprint,
+            fingerprints.scenario_fingerprint(
+                test, csv_outline, hooks_fingerprint,
+            ),
+        )
+
+        changed_path = os.path.join(os.path.dirname(self.path), 'changed.csv')
+        with open(changed_path, 'w') as changed_file:
+            changed_file.write('x,y,z\n1,1,3\n')
+        with mock.patch.object(test, 'examples_path',
+                               return_value=changed_path):
+            self.assertNotEqual(
+                fingerprint,
+                fingerprints.scenario_fingerprint(
+                    test, csv_outline, hooks_fingerprint,
+                ),
+            )
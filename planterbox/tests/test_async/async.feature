@@ -0,0 +1,11 @@
+Feature: Async steps
+    Steps and hooks can be coroutine functions, sharing one event loop.
+
+    Scenario: Await some steps
+        Given I open an async session
+        When I await 1 plus 1
+        Then the awaited result should be 2
+
+    Scenario: Reuse the event loop
+        Then the session is still usable
+        And a synchronous step gets the same event loop
@@ -0,0 +1,47 @@
+import asyncio
+
+from planterbox import (
+    step,
+    hook,
+)
+
+sessions = []
+
+
+@hook('before', 'scenario')
+async def before_scenario_hook(test):
+    await asyncio.sleep(0)
+    test.loop = asyncio.get_event_loop()
+
+
+@step(r'I open an async session')
+async def open_session(test):
+    queue = asyncio.Queue()
+    await queue.put('ready')
+    sessions.append((asyncio.get_event_loop(), queue))
+
+
+@step(r'I await (\d+) plus (\d+)')
+async def await_add(test, a, b):
+    await asyncio.sleep(0)
+    test.result = int(a) + int(b)
+
+
+@step(r'the awaited result should be (\d+)')
+async def check_result(test, value):
+    test.assertEqual(test.result, int(value))
+
+
+@step(r'the session is still usable')
+async def check_session(test):
+    test.assertEqual(len(sessions), 1)
+    loop, queue = sessions[0]
+    test.assertIs(asyncio.get_event_loop(), loop)
+    test.assertIs(test.loop, loop)
+    test.assertEqual(await queue.get(), 'ready')
+
+
+@step(r'a synchronous step gets the same event loop')
+def check_sync_loop(test):
+    loop, queue = sessions[0]
+    test.assertIs(asyncio.get_event_loop(), loop)
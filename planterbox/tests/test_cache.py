@@ -0,0 +1,91 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from planterbox.cache import (
+    clear_cache,
+    ParseCache,
+)
+from planterbox.parsing import (
+    parse_feature,
+)
+
+FEATURE_TEXT = u'''Feature: Cached Tests
+    Scenario: I need to verify basic arithmetic.
+        Given I add 1 and 1
+        Then the result should be {}
+'''
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.cache_dir = os.path.join(self.work_dir, 'cache')
+        self.feature_path = os.path.join(self.work_dir, 'cached.feature')
+        self.write_feature(2)
+        self.cache = ParseCache(self.cache_dir)
+
+    def write_feature(self, result, mtime=None):
+        with open(self.feature_path, 'wb') as f:
+            f.write(FEATURE_TEXT.format(result).encode('utf-8'))
+        if mtime is not None:
+            os.utime(self.feature_path, (mtime, mtime))
+
+    def steps(self, feature):
+        return [step.strip() for step in feature.scenarios[0].step_texts]
+
+    def test_parse(self):
+        self.assertEqual(
+            self.steps(self.cache.parse(self.feature_path)),
+            ['Given I add 1 and 1', 'Then the result should be 2'],
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_reuses_entry(self):
+        self.cache.parse(self.feature_path)
+        with mock.patch('planterbox.cache.parse_feature') as parse_feature:
+            self.cache.parse(self.feature_path)
+        parse_feature.assert_not_called()
+
+    def test_touched_file_reuses_entry(self):
+        self.write_feature(2, mtime=1000000000)
+        self.cache.parse(self.feature_path)
+        self.write_feature(2, mtime=1000000100)
+        with mock.patch('planterbox.cache.parse_feature') as parse_feature:
+            self.cache.parse(self.feature_path)
+        parse_feature.assert_not_called()
+
+    def test_changed_file_reparsed(self):
+        self.write_feature(2, mtime=1000000000)
+        self.cache.parse(self.feature_path)
+        self.write_feature(3, mtime=1000000100)
+        self.assertEqual(
+            self.steps(self.cache.parse(self.feature_path))[1],
+            'Then the result should be 3',
+        )
+
+    def test_version_change_reparsed(self):
+        self.cache.parse(self.feature_path)
+        with mock.patch('planterbox.cache.__version__', 'other'):
+            with mock.patch('planterbox.cache.parse_feature',
+                            wraps=parse_feature) as mock_parse_feature:
+                self.cache.parse(self.feature_path)
+        mock_parse_feature.assert_called_once()
+
+    def test_corrupt_entry_reparsed(self):
+        self.cache.parse(self.feature_path)
+        with open(self.cache.entry_path(self.feature_path), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertEqual(
+            self.steps(self.cache.parse(self.feature_path)),
+            ['Given I add 1 and 1', 'Then the result should be 2'],
+        )
+
+    def test_clear_cache(self):
+        self.cache.parse(self.feature_path)
+        clear_cache(self.cache_dir)
+        self.assertFalse(os.path.exists(self.cache_dir))
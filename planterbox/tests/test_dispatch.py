@@ -0,0 +1,161 @@
+import re
+import unittest
+
+from planterbox.decorators import (
+    step,
+)
+from planterbox.dispatch import (
+    MatchCache,
+    pattern_word,
+    StepDispatcher,
+)
+from planterbox.exceptions import (
+    MixedStepParametersException,
+    UnmatchedStepException,
+)
+
+
+def make_step_fn(*patterns, **kwargs):
+    def step_fn(test, *args, **kwargs):
+        pass
+
+    for pattern in patterns:
+        step_fn = step(pattern, **kwargs)(step_fn)
+    return step_fn
+
+
+class TestPatternWord(unittest.TestCase):
+    def word(self, pattern):
+        return pattern_word(step(pattern)(lambda test: None)
+                            .planterbox_patterns[0])
+
+    def test_plain_word(self):
+        self.assertEqual(self.word(r'I add (\d+) and (\d+)'), 'i')
+
+    def test_lowercases(self):
+        self.assertEqual(self.word(r'The result should be (\d+)'), 'the')
+
+    def test_leading_group(self):
+        self.assertIsNone(self.word(r'(\d+) apples'))
+
+    def test_unterminated_word(self):
+        self.assertIsNone(self.word(r'Iadd(\d+)'))
+
+    def test_quantified_word(self):
+        self.assertIsNone(self.word(r'adds? (\d+)'))
+
+    def test_quantified_space(self):
+        self.assertIsNone(self.word(r'I ?add (\d+)'))
+
+    def test_alternation(self):
+        self.assertIsNone(self.word(r'foo bar|baz'))
+
+    def test_non_ascii(self):
+        self.assertIsNone(self.word(u'\u017fum up (\\d+)'))
+
+    def test_foreign_pattern(self):
+        self.assertIsNone(pattern_word(re.compile(r'I add (\d+)')))
+
+
+class TestStepDispatcher(unittest.TestCase):
+    def test_positional_arguments(self):
+        add = make_step_fn(r'I add (\d+) and (\d+)')
+        dispatcher = StepDispatcher([add])
+        self.assertEqual(
+            dispatcher.match('    Given I add 1 and 2'),
+            (add, ('1', '2')),
+        )
+
+    def test_named_arguments(self):
+        check = make_step_fn(r'I check (?P<name>\w+) == (?P<value>\d+)')
+        dispatcher = StepDispatcher([check])
+        self.assertEqual(
+            dispatcher.match('Then I check z == 2'),
+            (check, {'name': 'z', 'value': '2'}),
+        )
+
+    def test_mixed_arguments(self):
+        mixed = make_step_fn(r'I mix (?P<name>\w+) and (\d+)')
+        dispatcher = StepDispatcher([mixed])
+        with self.assertRaises(MixedStepParametersException):
+            dispatcher.match('When I mix a and 1')
+
+    def test_unmatched(self):
+        add = make_step_fn(r'I add (\d+) and (\d+)')
+        dispatcher = StepDispatcher([add])
+        with self.assertRaises(UnmatchedStepException):
+            dispatcher.match('When I subtract 1 and 2')
+        with self.assertRaises(UnmatchedStepException):
+            dispatcher.match('I add 1 and 2')
+
+    def test_first_match_wins_across_buckets(self):
+        anything = make_step_fn(r'(.+) happens')
+        specific = make_step_fn(r'it happens')
+        dispatcher = StepDispatcher([anything, specific])
+        self.assertIs(dispatcher.match('When it happens')[0], anything)
+
+        dispatcher = StepDispatcher([specific, anything])
+        self.assertIs(dispatcher.match('When it happens')[0], specific)
+
+    def test_first_match_wins_within_step(self):
+        squiggly = make_step_fn(r'I add {(\d+)} and {(\d+)}',
+                                r'I add (.+) and (.+)')
+        self.assertEqual(
+            StepDispatcher([squiggly]).match('Given I add {1} and {2}'),
+            (squiggly, ('1', '2')),
+        )
+
+    def test_case_insensitive(self):
+        add = make_step_fn(r'I add (\d+) and (\d+)')
+        dispatcher = StepDispatcher([add])
+        self.assertEqual(
+            dispatcher.match('given i ADD 1 and 2'),
+            (add, ('1', '2')),
+        )
+
+    def test_multiline(self):
+        sum_up = make_step_fn(r'I sum up the following:', multiline='numbers')
+        dispatcher = StepDispatcher([sum_up])
+        self.assertEqual(
+            dispatcher.match('Given I sum up the following:\n1\n2'),
+            (sum_up, {'numbers': '1\n2'}),
+        )
+
+    def test_foreign_pattern(self):
+        def bare(test):
+            pass
+        bare.planterbox_patterns = [re.compile(r'.*bare step')]
+        dispatcher = StepDispatcher([bare])
+        self.assertIs(dispatcher.match('a bare step')[0], bare)
+
+
+class TestMatchCache(unittest.TestCase):
+    def setUp(self):
+        self.add = make_step_fn(r'I add (\d+) and (\d+)')
+        self.cache = MatchCache(StepDispatcher([self.add]), maxsize=2)
+
+    def test_hits_and_misses(self):
+        self.assertEqual(self.cache.match('Given I add 1 and 2'),
+                         (self.add, ('1', '2')))
+        self.assertEqual(self.cache.match('Given I add 1 and 2'),
+                         (self.add, ('1', '2')))
+        self.assertEqual(self.cache.match('Given I add 3 and 4'),
+                         (self.add, ('3', '4')))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.match('Given I add 1 and 2')
+        self.cache.match('Given I add 3 and 4')
+        self.cache.match('Given I add 1 and 2')
+        self.cache.match('Given I add 5 and 6')
+        self.assertEqual(
+            list(self.cache.entries),
+            ['Given I add 1 and 2', 'Given I add 5 and 6'],
+        )
+
+    def test_unmatched_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(UnmatchedStepException):
+                self.cache.match('When I subtract 1 and 2')
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+        self.assertEqual(len(self.cache.entries), 0)
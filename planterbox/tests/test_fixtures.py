@@ -0,0 +1,134 @@
+import sys
+import types
+import unittest
+
+from mock import (
+    Mock,
+)
+from nose2.util import (
+    transplant_class,
+)
+
+from planterbox import (
+    fixture,
+    step,
+)
+from planterbox.exceptions import (
+    FixtureException,
+)
+from planterbox.fixtures import (
+    close_fixtures,
+)
+from planterbox.registry import (
+    invalidate,
+)
+
+MODULE = 'planterbox_fixture_world'
+
+FEATURE_TEXT = '''Feature: Fixtures
+    Scenario: First
+        Given I use the fixtures
+
+    Scenario: Second
+        Given I use the fixtures
+'''
+
+
+class TestFixtures(unittest.TestCase):
+    def setUp(self):
+        self.events = events = []
+        world = types.ModuleType(MODULE)
+
+        @fixture(scope='session')
+        def session(test):
+            events.append('create session')
+            yield 'session'
+            events.append('teardown session')
+
+        @fixture(scope='feature', name='db')
+        def database(test):
+            events.append('create db')
+            yield 'db using ' + test.fixture('session')
+            events.append('teardown db')
+
+        @fixture()
+        def scenario(test):
+            events.append('create scenario')
+            yield test.fixture('db')
+            events.append('teardown scenario')
+
+        @step(r'I use the fixtures')
+        def use_fixtures(test):
+            events.append(test.fixture('scenario'))
+            events.append(test.fixture('scenario'))
+
+        for fn in (session, database, scenario, use_fixtures):
+            setattr(world, fn.__name__, fn)
+        sys.modules[MODULE] = world
+        self.addCleanup(sys.modules.pop, MODULE)
+        self.addCleanup(invalidate)
+        self.addCleanup(close_fixtures)
+
+    def run_feature(self, feature_text=FEATURE_TEXT):
+        from planterbox.feature import FeatureTestCase
+
+        test_case = transplant_class(FeatureTestCase, MODULE)(
+            feature_path='fixtures.feature',
+            feature_text=feature_text,
+        )
+        result = Mock()
+        test_case.run(result)
+        return test_case, result
+
+    def test_scopes(self):
+        test_case, result = self.run_feature()
+        self.assertEqual(result.addError.call_count, 0)
+        self.assertEqual(result.addSuccess.call_count, 2)
+        self.run_feature()
+        self.assertEqual(close_fixtures(), [])
+
+        self.assertEqual(self.events, [
+            'create scenario', 'create db', 'create session',
+            'db using session', 'db using session', 'teardown scenario',
+            'create scenario', 'db using session', 'db using session',
+            'teardown scenario', 'teardown db',
+            'create scenario', 'create db', 'db using session',
+            'db using session', 'teardown scenario',
+            'create scenario', 'db using session', 'db using session',
+            'teardown scenario', 'teardown db',
+            'teardown session',
+        ])
+
+    def test_outside_scope(self):
+        test_case, result = self.run_feature()
+        with self.assertRaises(FixtureException):
+            test_case.fixture('scenario')
+        with self.assertRaises(FixtureException):
+            test_case.fixture('missing')
+
+    def test_teardown_error(self):
+        @fixture(scope='feature', name='db')
+        def broken(test):
+            yield 'db'
+            raise RuntimeError('teardown failed')
+
+        sys.modules[MODULE].database = broken
+        test_case, result = self.run_feature()
+        self.assertEqual(result.addSuccess.call_count, 2)
+        self.assertEqual(result.addError.call_count, 1)
+        self.assertIs(result.addError.call_args[0][1][0], RuntimeError)
+        self.assertEqual(
+            [call[0] for call in result.mock_calls[-3:]],
+            ['startTest', 'addError', 'stopTest'],
+        )
+
+    def test_never_yields(self):
+        @fixture(name='scenario')
+        def empty(test):
+            return
+            yield
+
+        sys.modules[MODULE].scenario = empty
+        test_case, result = self.run_feature()
+        self.assertEqual(result.addError.call_count, 2)
+        self.assertIs(result.addError.call_args[0][1][0], FixtureException)
@@ -0,0 +1,106 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from planterbox.history import (
+    DurationHistory,
+)
+from planterbox.plugin import (
+    Planterbox,
+)
+
+
+class TestDurationHistory(unittest.TestCase):
+    def setUp(self):
+        plugin_patcher = mock.patch.multiple(
+            'planterbox.plugin.Planterbox',
+            # Short-circuit nose2 attempting to register this instance
+            addOption=mock.DEFAULT,
+            addFlag=mock.DEFAULT,
+        )
+        plugin_patcher.start()
+        self.addCleanup(plugin_patcher.stop)
+        self.pp = Planterbox()
+
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.history = DurationHistory(
+            os.path.join(self.work_dir, 'durations.json'),
+        )
+        self.pp.durationHistory = self.history
+
+    def test_save_and_load(self):
+        self.history.update([
+            ('scenario', 'pkg:a.feature:0', 2, 3.0, 2.0),
+        ])
+        self.history.save()
+        self.assertEqual(
+            DurationHistory(self.history.path).durations,
+            {'pkg:a.feature:0': 3.0},
+        )
+
+    def test_missing_or_corrupt(self):
+        self.assertEqual(self.history.durations, {})
+        with open(self.history.path, 'w') as history_file:
+            history_file.write('{')
+        self.assertEqual(DurationHistory(self.history.path).durations, {})
+
+    def test_features_longest_first(self):
+        self.history.durations = {
+            'planterbox.tests.test_feature:basic.feature:0': 1.0,
+            'planterbox.tests.test_feature:basic.feature:1': 1.0,
+            'planterbox.tests.test_feature:multiline.feature:0': 5.0,
+        }
+        suites = self.pp._from_names([
+            'planterbox.tests.test_feature:basic.feature',
+            'planterbox.tests.test_feature:multiline.feature',
+            'planterbox.tests.test_feature:examples.feature',
+        ])
+        # multiline.feature:1 and examples.feature have no history and are
+        # estimated at the average: 7.0 / 3 for each scenario.
+        self.assertEqual(
+            [suite._tests[0].feature_id() for suite in suites],
+            ['planterbox.tests.test_feature:multiline.feature',
+             'planterbox.tests.test_feature:examples.feature',
+             'planterbox.tests.test_feature:basic.feature'],
+        )
+
+    def test_scenarios_longest_first(self):
+        self.history.durations = {
+            'planterbox.tests.test_feature:basic.feature:0': 1.0,
+            'planterbox.tests.test_feature:basic.feature:1': 2.0,
+        }
+        self.pp.setSplitScenarios(None)
+        mock_event = mock.Mock()
+        mock_event.configure_mock(
+            name='planterbox.tests.test_feature:basic.feature',
+        )
+        suite = self.pp.loadTestsFromName(mock_event)
+        self.assertEqual(
+            [test.scenarios_to_run for test in suite._tests],
+            [{1}, {0}],
+        )
+
+    def test_sort_suite(self):
+        self.history.durations = {
+            'planterbox.tests.test_feature:basic.feature:0': 1.0,
+            'planterbox.tests.test_feature:basic.feature:1': 1.0,
+            'planterbox.tests.test_hooks:hooks.feature:0': 5.0,
+        }
+        basic = self.pp._from_names([
+            'planterbox.tests.test_feature:basic.feature',
+        ])[0]
+        hooks = self.pp._from_names([
+            'planterbox.tests.test_hooks:hooks.feature',
+        ])[0]
+        other = unittest.FunctionTestCase(lambda: None)
+        suite = unittest.TestSuite([
+            other, unittest.TestSuite([basic]), hooks,
+        ])
+        self.history.sort_suite(suite)
+        self.assertEqual(suite._tests[0], hooks)
+        self.assertEqual(suite._tests[1]._tests, [basic])
+        self.assertEqual(suite._tests[2], other)
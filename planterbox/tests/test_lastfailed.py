@@ -0,0 +1,113 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from planterbox.lastfailed import (
+    LastFailed,
+    scenario_ids,
+    STATE_FILE,
+)
+from planterbox.plugin import (
+    Planterbox,
+)
+
+
+class TestLastFailed(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.path = os.path.join(self.work_dir, STATE_FILE)
+
+    def test_update(self):
+        last_failed = LastFailed(self.path)
+        last_failed.failed = {
+            'pkg:a.feature:0', 'pkg:a.feature:1', 'pkg:b.feature:0',
+            'pkg:c.feature',
+        }
+        last_failed.update(
+            ran=['pkg:a.feature', 'pkg:b.feature:0', 'pkg:c.feature:0'],
+            failed=['pkg:a.feature:2'],
+        )
+        last_failed.save()
+
+        last_failed = LastFailed(self.path)
+        self.assertEqual(
+            last_failed.failed, {'pkg:a.feature:2', 'pkg:c.feature'},
+        )
+        self.assertEqual(last_failed.failed_scenarios('pkg:a.feature'), {2})
+        self.assertEqual(last_failed.failed_scenarios('pkg:c.feature'), set())
+        self.assertIsNone(last_failed.failed_scenarios('pkg:b.feature'))
+
+    def test_scenario_ids(self):
+        test = mock.Mock(spec=['feature_id', 'scenarios_to_run'])
+        test.feature_id.return_value = 'pkg:a.feature'
+        test.scenarios_to_run = None
+        self.assertEqual(scenario_ids(test), ['pkg:a.feature'])
+        self.assertEqual(
+            scenario_ids(test, mock.Mock(scenario_index=3)),
+            ['pkg:a.feature:3'],
+        )
+
+
+class TestLastFailedPlugin(unittest.TestCase):
+    def setUp(self):
+        plugin_patcher = mock.patch.multiple(
+            'planterbox.plugin.Planterbox',
+            # Short-circuit nose2 attempting to register this instance
+            addOption=mock.DEFAULT,
+            addFlag=mock.DEFAULT,
+        )
+        plugin_patcher.start()
+        self.addCleanup(plugin_patcher.stop)
+        self.pp = Planterbox()
+
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        self.pp.lastFailed = LastFailed(os.path.join(work_dir, STATE_FILE))
+        self.pp.lastFailed.by_feature = {
+            'planterbox.tests.test_feature:basic.feature': {1},
+        }
+        self.pp.lastFailed.failed = {
+            'planterbox.tests.test_feature:basic.feature:1',
+        }
+
+    def load(self, *names):
+        return self.pp._from_names(list(names))
+
+    def test_last_failed(self):
+        self.pp.setLastFailed()
+        basic, multiline = self.load(
+            'planterbox.tests.test_feature:basic.feature',
+            'planterbox.tests.test_feature:multiline.feature',
+        )
+        self.assertEqual(basic._tests[0].scenarios_to_run, {1})
+        self.assertEqual(multiline._tests, [])
+
+    def test_last_failed_named(self):
+        self.pp.setLastFailed()
+        basic, = self.load(
+            'planterbox.tests.test_feature:basic.feature:'
+            '"I verify basic arithmetic with fancy keyword arg patterns"',
+        )
+        self.assertEqual(basic._tests[0].scenarios_to_run, {1})
+
+        basic, = self.load(
+            'planterbox.tests.test_feature:basic.feature:'
+            '"I need to verify basic arithmetic."',
+        )
+        self.assertEqual(basic._tests, [])
+
+    def test_failed_first(self):
+        self.pp.setFailedFirst()
+        suites = self.load(
+            'planterbox.tests.test_feature:basic_examples.feature',
+            'planterbox.tests.test_feature:basic.feature',
+        )
+        self.assertEqual(
+            [suite._tests[0].id() for suite in suites],
+            ['planterbox.tests.test_feature:basic.feature',
+             'planterbox.tests.test_feature:basic_examples.feature'],
+        )
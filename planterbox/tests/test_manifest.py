@@ -0,0 +1,159 @@
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+import mock
+
+from planterbox.lastfailed import (
+    LastFailed,
+)
+from planterbox.manifest import (
+    Manifest,
+    MANIFEST_FILE,
+)
+from planterbox.plugin import (
+    Planterbox,
+)
+
+FEATURE_TEXT = u'''Feature: Manifest Tests
+    Scenario: Pass
+        Scenario Tag: {}
+        Given I pass
+'''
+
+PACKAGE = 'planterbox_manifest_package'
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.package_dir = os.path.join(self.work_dir, PACKAGE)
+        os.mkdir(self.package_dir)
+        with open(os.path.join(self.package_dir, '__init__.py'), 'w') as f:
+            f.write('from planterbox import step\n\n\n'
+                    '@step(r"I pass")\ndef passes(test):\n    pass\n')
+        self.write_feature('one.feature', 'fast')
+        self.write_feature('two.feature', 'slow')
+
+        self.manifest_path = os.path.join(self.work_dir, MANIFEST_FILE)
+        self.addCleanup(sys.modules.pop, PACKAGE, None)
+        self.addCleanup(
+            lambda: sys.path.remove(self.work_dir)
+            if self.work_dir in sys.path else None
+        )
+
+    def write_feature(self, name, tag, mtime=None):
+        path = os.path.join(self.package_dir, name)
+        with open(path, 'wb') as f:
+            f.write(FEATURE_TEXT.format(tag).encode('utf-8'))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def build(self):
+        manifest = Manifest(self.manifest_path)
+        parsed = manifest.build(self.work_dir)
+        manifest.save()
+        return Manifest(self.manifest_path), parsed
+
+    def test_build(self):
+        manifest, parsed = self.build()
+        self.assertEqual(parsed, 2)
+        entry = manifest.entry(os.path.join(self.package_dir, 'one.feature'))
+        self.assertEqual(entry['package'], PACKAGE)
+        self.assertEqual(manifest.import_path(entry), self.work_dir)
+        self.assertEqual(
+            entry['scenarios'], [{'index': 0, 'name': 'Pass', 'tags': ['fast']}],
+        )
+        self.assertEqual(
+            manifest.find(PACKAGE, 'two.feature'),
+            os.path.join(self.package_dir, 'two.feature'),
+        )
+
+    def test_incremental(self):
+        self.build()
+        manifest, parsed = self.build()
+        self.assertEqual(parsed, 0)
+
+        self.write_feature('two.feature', 'quick')
+        self.write_feature('three.feature', 'fast')
+        manifest, parsed = self.build()
+        self.assertEqual(parsed, 2)
+        self.assertEqual(len(manifest.features), 3)
+
+    def make_plugin(self):
+        plugin_patcher = mock.patch.multiple(
+            'planterbox.plugin.Planterbox',
+            # Short-circuit nose2 attempting to register this instance
+            addOption=mock.DEFAULT,
+            addFlag=mock.DEFAULT,
+        )
+        plugin_patcher.start()
+        self.addCleanup(plugin_patcher.stop)
+        pp = Planterbox()
+        pp.manifest = Manifest(self.manifest_path)
+        pp.setManifestDiscovery()
+        return pp
+
+    def test_discovery(self):
+        self.build()
+        pp = self.make_plugin()
+        pp.tag_list = ['slow']
+
+        event = mock.Mock(path=self.work_dir)
+        event.loader.suiteClass = list
+        suites = pp.handleDir(event)
+        self.assertTrue(event.handled)
+        self.assertNotIn(PACKAGE, sys.modules)
+        self.assertEqual(
+            [test.id() for suite in suites for test in suite],
+            [PACKAGE + ':two.feature'],
+        )
+
+    def test_discovery_stale(self):
+        self.build()
+        os.unlink(os.path.join(self.package_dir, 'one.feature'))
+        self.write_feature('two.feature', 'quick', mtime=1)
+        sys.path.insert(0, self.work_dir)
+        pp = self.make_plugin()
+        pp.tag_list = ['quick']
+
+        event = mock.Mock(path=self.work_dir)
+        event.loader.suiteClass = list
+        suites = pp.handleDir(event)
+        self.assertEqual(
+            [test.id() for suite in suites for test in suite],
+            [PACKAGE + ':two.feature'],
+        )
+
+    def test_names_stale(self):
+        self.build()
+        self.write_feature('two.feature', 'quick', mtime=1)
+        sys.path.insert(0, self.work_dir)
+        pp = self.make_plugin()
+        pp.tag_list = ['quick']
+
+        suite = pp._from_names([PACKAGE + ':two.feature'])[0]
+        self.assertEqual(
+            [test.id() for test in suite], [PACKAGE + ':two.feature'],
+        )
+
+    def test_last_failed(self):
+        self.build()
+        pp = self.make_plugin()
+        pp.setLastFailed()
+        pp.lastFailed = LastFailed(os.path.join(self.work_dir, 'failed.json'))
+        pp.lastFailed.by_feature = {PACKAGE + ':two.feature': {0}}
+        pp.lastFailed.failed = {PACKAGE + ':two.feature:0'}
+
+        one, two = pp._from_names(
+            [PACKAGE + ':one.feature', PACKAGE + ':two.feature'],
+        )
+        self.assertNotIn(PACKAGE, sys.modules)
+        self.assertEqual(list(one), [])
+        self.assertEqual(
+            [test.scenarios_to_run for test in two], [{0}],
+        )
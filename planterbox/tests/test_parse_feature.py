@@ -13,19 +13,20 @@ class TestParseFeature(TestCase):
         with open(os.path.join(features_dir, 'basic.feature'), mode='r') as f:
             feature_text = f.read()
 
-        features, scenarios = parse_feature(feature_text)
+        feature = parse_feature(feature_text)
 
         self.assertEqual(
-            [feature.strip() for feature in features],
+            [line.strip() for line in feature.header],
             ['Feature: Basic Tests',
              'I want to exercise generation of a simple test from a feature.'],
         )
+        self.assertEqual(feature.name, 'Basic Tests')
 
-        scenario = scenarios[0]
-        self.assertEqual(scenario[0].strip(),
+        scenario = feature.scenarios[0]
+        self.assertEqual(scenario.text.strip(),
                          'Scenario: I need to verify basic arithmetic.')
         self.assertEqual(
-            [scen.strip() for scen in scenario[1]],
+            [step.strip() for step in scenario.step_texts],
             ['Given I add 1 and 1', 'Then the result should be 2'],
         )
 
@@ -40,18 +41,113 @@ class TestParseFeature(TestCase):
         with open(basic_examples_filename, mode='r') as f:
             feature_text = f.read()
 
-        features, scenarios = parse_feature(feature_text)
+        feature = parse_feature(feature_text)
 
         self.assertEqual(
-            [feature.strip() for feature in features],
+            [line.strip() for line in feature.header],
             ['Feature: Basic Tests',
              'I want to exercise generation of a simple test from a feature.'],
         )
+        self.assertEqual(feature.name, 'Basic Tests')
 
-        scenario = scenarios[0]
-        self.assertEqual(scenario[0].strip(),
+        scenario = feature.scenarios[0]
+        self.assertEqual(scenario.text.strip(),
                          'Scenario: I need to verify basic arithmetic.')
         self.assertEqual(
-            [scen.strip() for scen in scenario[1]],
+            [step.strip() for step in scenario.step_texts],
             ['Given I add 1 and 1', 'Then the result should be 2'],
         )
+
+    def test_line_numbers(self):
+        from . import test_feature
+        from planterbox.parsing import parse_feature
+
+        features_dir = os.path.dirname(test_feature.__file__)
+
+        with open(os.path.join(features_dir, 'multiline.feature'),
+                  mode='r') as f:
+            feature = parse_feature(f)
+
+        self.assertEqual(
+            [(scenario.line, [step.line for step in scenario.steps])
+             for scenario in feature.scenarios],
+            [(4, [5, 12]), (15, [16, 23])],
+        )
+
+    def test_line_iterable(self):
+        from planterbox.parsing import parse_feature
+
+        feature = parse_feature(iter([
+            'Feature: Iterated\n',
+            '    Scenario: Lines one at a time\n',
+            '        Given I sum up the following:\n',
+            '            """\n',
+            '            1\n',
+            '            2\n',
+            '            """\n',
+            '        Then the result should be 3\n',
+        ]))
+
+        self.assertEqual(feature.header, ('Feature: Iterated',))
+        self.assertEqual(
+            feature.scenarios[0].step_texts,
+            ['        Given I sum up the following:'
+             '\n            1\n            2',
+             '        Then the result should be 3'],
+        )
+
+    def test_nodes(self):
+        from . import test_feature
+        from planterbox.nodes import (
+            ExamplesTable,
+            Outline,
+            Scenario,
+        )
+        from planterbox.parsing import parse_feature
+
+        features_dir = os.path.dirname(test_feature.__file__)
+
+        with open(os.path.join(features_dir, 'basic.feature')) as f:
+            basic = parse_feature(f)
+        with open(os.path.join(features_dir, 'examples.feature')) as f:
+            examples = parse_feature(f)
+
+        scenario = basic.scenarios[0]
+        self.assertIs(type(scenario), Scenario)
+        self.assertEqual(scenario.index, 0)
+        self.assertEqual(scenario.name, 'I need to verify basic arithmetic.')
+        self.assertEqual(scenario.short_name,
+                         'I need to verify basic arithmetic')
+        self.assertEqual(scenario.tags, frozenset(['math1', 'math2']))
+        self.assertIsNone(scenario.examples)
+
+        outline, file_outline = examples.scenarios
+        self.assertIs(type(outline), Outline)
+        self.assertEqual(outline.index, 0)
+        self.assertEqual(
+            [row.strip() for row in outline.examples.rows],
+            ['x | y | z', '1 | 1 | 2', '1 | 2 | 3', '2 | 1 | 3', '2 | 2 | 4'],
+        )
+        self.assertEqual(file_outline.index, 1)
+        self.assertEqual(file_outline.examples,
+                         ExamplesTable(file='examples.csv'))
+
+    def test_scan_scenario_tags(self):
+        import glob
+        from planterbox.parsing import (
+            parse_feature,
+            scan_scenario_tags,
+        )
+
+        features = glob.glob(os.path.join(
+            os.path.dirname(__file__), '*', '*.feature',
+        ))
+        self.assertTrue(features)
+        for feature_path in features:
+            with open(feature_path) as f:
+                feature = parse_feature(f)
+            with open(feature_path) as f:
+                self.assertEqual(
+                    scan_scenario_tags(f),
+                    [scenario.tags for scenario in feature.scenarios],
+                )
@@ -2,6 +2,10 @@ import mock
 import os.path
 import unittest
 
+from nose2.util import (
+    object_from_name,
+)
+
 from planterbox.plugin import (
     normalize_names,
     Planterbox,
@@ -395,3 +399,49 @@ class TestPlanterboxPluginFlags(unittest.TestCase):
         self.pp.setCheckOnly(None)
         suite = self.pp.loadTestsFromName(mock_event)
         self.assertEqual(len(suite._tests), 0)
+
+    def testTagsFilterBeforeImport(self):
+        self.pp.tag_list = ['math1 and not slow']
+        feature_dir = os.path.join(os.path.dirname(__file__), 'test_feature')
+        with mock.patch(
+            'planterbox.plugin.object_from_name', wraps=object_from_name,
+        ) as importer:
+            for feature, imported in [
+                ('basic.feature', True),
+                ('multiline.feature', False),
+            ]:
+                importer.reset_mock()
+                event = mock.Mock(path=os.path.join(feature_dir, feature))
+                self.pp.handleFile(event)
+                self.assertTrue(event.handled)
+                self.assertEqual(importer.called, imported)
+
+    def testMalformedTagRejected(self):
+        self.pp.tag_list = ['math1 and']
+        self.pp.session = mock.Mock()
+        self.pp.handleArgs(mock.Mock())
+        self.assertEqual(self.pp.session.argparse.error.call_count, 1)
+
+        self.pp.tag_list = ['math1 and not slow']
+        self.pp.handleArgs(mock.Mock())
+        self.assertIs(
+            self.pp.get_tag_expression(), self.pp.tagExpression,
+        )
+        self.assertTrue(self.pp.tagExpression.matches({'math1'}))
+
+    def testSplitScenarios(self):
+        mock_event = mock.Mock()
+        mock_event.configure_mock(
+            name='planterbox.tests.test_feature:basic.feature',
+        )
+        self.pp.setSplitScenarios(None)
+        suite = self.pp.loadTestsFromName(mock_event)
+        self.assertEqual(
+            [test.id() for test in suite._tests],
+            ['planterbox.tests.test_feature:basic.feature:0',
+             'planterbox.tests.test_feature:basic.feature:1'],
+        )
+        self.assertEqual(
+            [test.scenarios_to_run for test in suite._tests],
+            [{0}, {1}],
+        )
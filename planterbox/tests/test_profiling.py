@@ -0,0 +1,121 @@
+import hashlib
+import os
+import pstats
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from planterbox.profiling import (
+    clear_profiles,
+    merge_profiles,
+    MERGED_PROFILE,
+    profile_path,
+)
+
+
+class TestProfiling(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+
+    def test_scenarios_profiled(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I test a thing
+
+            Scenario Outline: A Test Outline
+                When I test <x>
+                Examples:
+                    x
+                    a thing
+                    a thing
+        """
+
+        @step(r'I test a thing')
+        def test_thing(test):
+            pass
+
+        mock_world = Mock(
+            spec=['test_thing'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = test_thing
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+                profile_dir=self.profile_dir,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(Mock())
+
+        prefix = 'mock-foobar.feature-{}'.format(
+            hashlib.sha1(b'mock:foobar.feature').hexdigest()[:8],
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.profile_dir)),
+            [prefix + '-0.pstats',
+             prefix + '-1-0.pstats',
+             prefix + '-1-1.pstats'],
+        )
+
+        merged_path = merge_profiles(self.profile_dir)
+        self.assertEqual(os.path.basename(merged_path), MERGED_PROFILE)
+        calls = {
+            function[2]: stat[1]
+            for function, stat in pstats.Stats(merged_path).stats.items()
+        }
+        self.assertEqual(calls['test_thing'], 3)
+
+        clear_profiles(self.profile_dir)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+        self.assertIsNone(merge_profiles(self.profile_dir))
+
+    def test_profile_paths_distinct(self):
+        self.assertNotEqual(
+            profile_path(self.profile_dir, 'pkg:a/b.feature', 0),
+            profile_path(self.profile_dir, 'pkg:a-b.feature', 0),
+        )
+
+    def test_threads_ignored(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I test a thing
+
+            Scenario: Another Test Scenario
+                When I test a thing
+        """
+
+        @step(r'I test a thing')
+        def test_thing(test):
+            pass
+
+        mock_world = Mock(spec=['test_thing'], return_value=None)
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = test_thing
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+                config=Mock(as_int=Mock(return_value=4)),
+                profile_dir=self.profile_dir,
+            )
+            test_case.__module__ = 'mock'
+            with patch.object(test_case, 'run_concurrently') as concurrently:
+                test_case.run(Mock())
+
+        self.assertFalse(concurrently.called)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 2)
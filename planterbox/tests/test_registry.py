@@ -0,0 +1,126 @@
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+from six.moves import (
+    reload_module,
+)
+
+from planterbox.registry import (
+    invalidate,
+    StepRegistry,
+)
+
+STEPS_SOURCE = '''
+from planterbox import hook, step
+
+
+@step(r'I do {0}')
+def do_thing(test):
+    pass
+
+
+@hook('before', 'scenario')
+@hook('after', 'scenario')
+def scenario_hook(test):
+    pass
+
+
+@hook('after', 'scenario')
+def another_scenario_hook(test):
+    pass
+'''
+
+
+class TestStepRegistry(unittest.TestCase):
+    def setUp(self):
+        self.package_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.package_dir)
+        sys.path.insert(0, self.package_dir)
+        self.addCleanup(sys.path.remove, self.package_dir)
+        self.addCleanup(sys.modules.pop, 'registry_steps', None)
+        self.write_steps('something')
+
+        import registry_steps
+        self.module = registry_steps
+        self.addCleanup(invalidate, self.module)
+
+    def write_steps(self, thing, filename='registry_steps.py'):
+        path = os.path.join(self.package_dir, filename)
+        with open(path, 'w') as f:
+            f.write(STEPS_SOURCE.format(thing))
+        # Filesystems with coarse timestamps could give the rewrite the
+        # same modification time
+        mtime = os.stat(path).st_mtime
+        if getattr(self, 'mtime', None) is not None and mtime <= self.mtime:
+            mtime = self.mtime + 1
+            os.utime(path, (mtime, mtime))
+        self.mtime = mtime
+
+    def test_harvests_steps(self):
+        registry = StepRegistry.for_module(self.module)
+        self.assertEqual(registry.steps, [self.module.do_thing])
+        self.assertIs(
+            registry.dispatcher.match('When I do something')[0],
+            self.module.do_thing,
+        )
+
+    def test_harvests_hooks(self):
+        registry = StepRegistry.for_module(self.module)
+        self.assertEqual(
+            registry.hooks,
+            {
+                ('before', 'scenario'): (self.module.scenario_hook,),
+                ('after', 'scenario'): (
+                    self.module.another_scenario_hook,
+                    self.module.scenario_hook,
+                ),
+            },
+        )
+
+    def test_shared_between_lookups(self):
+        self.assertIs(
+            StepRegistry.for_module(self.module),
+            StepRegistry.for_module(self.module),
+        )
+
+    def test_reload_invalidates(self):
+        registry = StepRegistry.for_module(self.module)
+        self.write_steps('something else')
+        reload_module(self.module)
+
+        reloaded = StepRegistry.for_module(self.module)
+        self.assertIsNot(reloaded, registry)
+        reloaded.dispatcher.match('When I do something else')
+        self.assertIs(StepRegistry.for_module(self.module), reloaded)
+
+    def test_submodule_reload_invalidates(self):
+        package_dir = os.path.join(self.package_dir, 'registry_package')
+        os.mkdir(package_dir)
+        with open(os.path.join(package_dir, '__init__.py'), 'w') as f:
+            f.write('from .steps import *\n')
+        self.write_steps('something', os.path.join(package_dir, 'steps.py'))
+        for name in ('registry_package.steps', 'registry_package'):
+            self.addCleanup(sys.modules.pop, name, None)
+
+        import registry_package
+        self.addCleanup(invalidate, registry_package)
+        registry = StepRegistry.for_module(registry_package)
+
+        self.write_steps(
+            'something else', os.path.join(package_dir, 'steps.py'),
+        )
+        reload_module(registry_package.steps)
+        self.assertFalse(registry.is_current(registry_package))
+        reload_module(registry_package)
+
+        reloaded = StepRegistry.for_module(registry_package)
+        self.assertIsNot(reloaded, registry)
+        reloaded.dispatcher.match('When I do something else')
+
+    def test_explicit_invalidate(self):
+        registry = StepRegistry.for_module(self.module)
+        invalidate(self.module)
+        self.assertIsNot(StepRegistry.for_module(self.module), registry)
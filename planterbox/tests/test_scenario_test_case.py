@@ -7,6 +7,7 @@ from six import (
 )
 
 from planterbox.exceptions import UnmatchedStepException
+from planterbox.lastfailed import scenario_ids
 
 class TestFeatureTestCase(TestCase):
     def tearDown(self):
@@ -87,16 +88,13 @@ class TestFeatureTestCase(TestCase):
                 FeatureTestCase(
                     feature_path='foobar.feature',
                     feature_text=test_feature,
-                )
+                ).check_scenarios()
         except UnmatchedStepException as e:
             self.assertIn(
                 '"undefined" missing from outline example',
                 str(e.args[0]),
             )
-            self.assertIn(
-                "{'x': '1', 'y': '1', 'z': '2'}",
-                str(e.args[0]),
-            )
+            self.assertIn('x | y | z', str(e.args[0]))
 
 
     def test_specific_scenario_index(self):
@@ -356,3 +354,567 @@ class TestFeatureTestCase(TestCase):
             self.fail(formatted)
 
         mock_world.test_thing.assert_called_once()
+
+    def test_steps_resolved_once(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I test a thing
+                Then I test 1 thing
+
+            Scenario Outline: A Test Outline
+                When I test a thing
+                Then I test <x> thing
+                Examples:
+                    x
+                    1
+                    2
+        """
+
+        mock_world = Mock(
+            spec=['test_thing', 'test_number'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = step(r'I test a thing')(Mock(
+            planterbox_patterns=[],
+        ))
+        mock_world.test_number = step(r'I test (\d+) thing')(Mock(
+            planterbox_patterns=[],
+        ))
+
+        mock_result = Mock()
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            with patch.object(test_case, 'match_step',
+                              wraps=test_case.match_step) as match_step:
+                test_case.run(mock_result)
+
+        self.assertEqual(mock_result.addSuccess.call_count, 3)
+        self.assertEqual(mock_world.test_thing.call_count, 3)
+        # Every step is matched once, except the second example's step with a
+        # placeholder, which check_scenarios didn't resolve.
+        self.assertEqual(match_step.call_count, 5)
+
+    def test_check_selected_scenarios(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Broken Scenario
+                When I do something undefined
+
+            Scenario: A Test Scenario
+                When I test a thing
+        """
+
+        mock_world = Mock(
+            spec=['test_thing'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = step(r'I test a thing')(Mock(
+            planterbox_patterns=[],
+        ))
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            with self.assertRaises(UnmatchedStepException):
+                test_case.check_scenarios()
+
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+                scenarios_to_run=[1],
+            )
+            test_case.check_scenarios()
+            self.assertEqual(list(test_case.plan), [1])
+
+    def test_match_cache(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I test a thing
+        """
+
+        mock_world = Mock(
+            spec=['test_thing'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = step(r'I test a thing')(Mock(
+            planterbox_patterns=[],
+        ))
+        config = Mock(as_int=Mock(return_value=16))
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+                config=config,
+            )
+            test_case.step_registry
+            self.assertIsNone(test_case.match_cache)
+
+            test_case.check_scenarios()
+            match_cache = test_case.match_cache
+            self.assertIs(
+                match_cache, test_case.step_registry.get_match_cache(16),
+            )
+            self.assertEqual((match_cache.hits, match_cache.misses), (0, 1))
+            test_case.match_step(test_case.scenarios[0].step_texts[0])
+            self.assertEqual((match_cache.hits, match_cache.misses), (1, 1))
+
+    def test_unmatched_step_reported_at_run(self):
+        from planterbox.feature import FeatureTestCase
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Broken Scenario
+                When I do something undefined
+        """
+
+        mock_world = Mock(
+            spec=[],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+
+        def mock_addError(result, exc):
+            self.exc_info = exc
+
+        mock_result = Mock(addError=Mock(side_effect=mock_addError))
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(mock_result)
+
+        self.assertIs(self.exc_info[0], UnmatchedStepException)
+        mock_result.startTest.assert_called_once_with(test_case)
+        mock_result.stopTest.assert_called_once_with(test_case)
+
+    def test_scenario_threads(self):
+        import threading
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Waiting Scenario
+                When I wait for ping
+
+            Scenario: A Signalling Scenario
+                When I signal ping
+
+            Scenario: A Failing Scenario
+                When I wait for nothing
+        """
+
+        events = {'ping': threading.Event(), 'nothing': threading.Event()}
+
+        @step(r'I wait for (\w+)')
+        def wait_for(test, name):
+            test.assertTrue(events[name].wait(1), name)
+
+        @step(r'I signal (\w+)')
+        def signal(test, name):
+            events[name].set()
+
+        mock_world = Mock(
+            spec=['wait_for', 'signal'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.wait_for = wait_for
+        mock_world.signal = signal
+
+        config = Mock()
+        config.as_int.side_effect = lambda option, default: {
+            'scenario-threads': 3,
+        }.get(option, default)
+        passed = []
+        mock_result = Mock()
+        mock_result.addSuccess.side_effect = lambda test: passed.extend(
+            scenario_ids(test),
+        )
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+                config=config,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(mock_result)
+
+        self.assertEqual(
+            [name for name, args, kwargs in mock_result.method_calls],
+            ['startTest', 'addSuccess', 'stopTest',
+             'startTest', 'addSuccess', 'stopTest',
+             'startTest', 'addFailure', 'stopTest'],
+        )
+        # Each scenario reports as its own copy of the test case
+        tests = [args[0] for name, args, kwargs in mock_result.method_calls]
+        for i in range(0, 9, 3):
+            self.assertIs(tests[i], tests[i + 1])
+            self.assertIs(tests[i], tests[i + 2])
+        self.assertEqual(len({id(test) for test in tests}), 3)
+        self.assertNotIn(id(test_case), {id(test) for test in tests})
+        exc_info = mock_result.addFailure.call_args[0][1]
+        self.assertEqual(exc_info.scenario_index, 2)
+        # Replayed outcomes are reported for their scenarios
+        self.assertEqual(
+            passed, ['mock:foobar.feature:0', 'mock:foobar.feature:1'],
+        )
+
+    def test_recording_result(self):
+        from planterbox.feature import RecordingResult
+
+        result = Mock(shouldStop=False, failfast=True, errors=[])
+        recording = RecordingResult(result)
+        self.assertIs(recording.shouldStop, False)
+        self.assertIs(recording.failfast, True)
+        self.assertIs(recording.errors, result.errors)
+
+        recording.startTest('test')
+        recording.addError('test', 'exc_info')
+        recording.stopTest('test')
+        self.assertEqual(result.method_calls, [])
+
+        recording.replay(result)
+        self.assertEqual(
+            [name for name, args, kwargs in result.method_calls],
+            ['startTest', 'addError', 'stopTest'],
+        )
+
+    def test_split_scenarios_share_feature_hooks(self):
+        from planterbox.feature import (
+            close_split_features,
+            FeatureTestCase,
+        )
+        from planterbox import hook, step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A First Scenario
+                When I use the resource
+
+            Scenario: A Second Scenario
+                When I use the resource
+        """
+
+        events = []
+
+        @hook('before', 'feature')
+        def before_feature(test):
+            events.append('before feature')
+            test.resource = 'resource'
+
+        @hook('after', 'feature')
+        def after_feature(test):
+            events.append('after feature')
+
+        @step(r'I use the resource')
+        def use_resource(test):
+            events.append(test.resource)
+
+        mock_world = Mock(
+            spec=['before_feature', 'after_feature', 'use_resource'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.before_feature = before_feature
+        mock_world.after_feature = after_feature
+        mock_world.use_resource = use_resource
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            for keep_open in (False, True):
+                del events[:]
+                mock_result = Mock()
+                test_case = FeatureTestCase(
+                    feature_path='foobar.feature',
+                    feature_text=test_feature,
+                )
+                test_case.__module__ = 'mock'
+                for test in test_case.split_scenarios(keep_open=keep_open):
+                    test.run(mock_result)
+                if keep_open:
+                    # As in a worker, until it stops
+                    self.assertEqual(events[-1], 'resource')
+                    close_split_features(mock_result)
+
+                self.assertEqual(
+                    events,
+                    ['before feature', 'resource', 'resource',
+                     'after feature'],
+                )
+                self.assertEqual(mock_result.addSuccess.call_count, 2)
+
+    def test_examples_file(self):
+        import os.path
+        import shutil
+        import tempfile
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario Outline: A Test Outline
+                When I test <value>
+                Examples file:
+                    examples.csv
+        """
+
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        with open(os.path.join(work_dir, 'examples.csv'), 'w') as f:
+            f.write('value,other\n"a | b",1\n\n" c ",2\n')
+
+        tested = []
+
+        @step(r'I test (.+)')
+        def test_value(test, value):
+            tested.append(value)
+
+        mock_world = Mock(
+            spec=['test_value'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_value = test_value
+
+        mock_result = Mock()
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path=os.path.join(work_dir, 'foobar.feature'),
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            examples = test_case.load_examples(
+                test_case.scenarios[0].examples,
+            )
+            self.assertEqual(next(examples), {'value': 'a | b', 'other': '1'})
+            examples.close()
+            test_case.run(mock_result)
+
+        self.assertEqual(tested, ['a | b', 'c'])
+        self.assertEqual(mock_result.addSuccess.call_count, 2)
+
+    def test_batch_step(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario Outline: A Test Outline
+                When I post <payload> to <path>
+                Then I check <payload>
+                Examples:
+                    payload | path
+                    a       | /x
+                    b       | /y
+                    c       | /z
+        """
+
+        posted = []
+        checked = []
+
+        @step(r'I post (\w+) to (\S+)', batch=True)
+        def post(test, payloads, paths):
+            posted.append((payloads, paths))
+            return [None, test.failureException('bad'), None]
+
+        @step(r'I check (\w+)')
+        def check(test, payload):
+            checked.append(payload)
+
+        mock_world = Mock(
+            spec=['post', 'check'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.post = post
+        mock_world.check = check
+
+        def mock_addFailure(result, exc):
+            self.exc_info = exc
+
+        passed = []
+        mock_result = Mock(
+            addFailure=Mock(side_effect=mock_addFailure),
+            addSuccess=Mock(
+                side_effect=lambda test: passed.extend(scenario_ids(test)),
+            ),
+        )
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(mock_result)
+
+        self.assertEqual(posted, [(['a', 'b', 'c'], ['/x', '/y', '/z'])])
+        self.assertEqual(passed, ['mock:foobar.feature:0'] * 2)
+        self.assertEqual(checked, ['a', 'c'])
+        self.assertEqual(mock_result.addSuccess.call_count, 2)
+        self.assertEqual(mock_result.startTest.call_count, 3)
+        self.assertEqual(mock_result.stopTest.call_count, 3)
+        self.assertIn("'payload': 'b'", self.exc_info.scenario_name)
+        self.assertEqual(self.exc_info.failed_step.strip(),
+                         'When I post b to /y')
+
+    def test_batch_step_waits_for_earlier_steps(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario Outline: A Test Outline
+                Given I prepare <payload>
+                When I post <payload> <where>
+                Then I check <payload>
+                Examples:
+                    payload | where
+                    a       | locally
+                    b       | to /y
+                    c       | to /z
+                    d       | to /w
+        """
+
+        events = []
+
+        @step(r'I prepare (\w+)')
+        def prepare(test, payload):
+            events.append(('prepare', payload))
+            test.prepared = payload
+            if payload == 'c':
+                test.fail('Could not prepare c')
+
+        @step(r'I post (\w+) locally')
+        def post_locally(test, payload):
+            events.append(('post locally', payload))
+
+        @step(r'I post (\w+) to (\S+)', batch=True)
+        def post(test, payloads, paths):
+            events.append(('post', payloads))
+            return [test.failureException('bad'), None]
+
+        @step(r'I check (\w+)')
+        def check(test, payload):
+            test.assertEqual(test.prepared, payload)
+            events.append(('check', payload))
+
+        mock_world = Mock(
+            spec=['prepare', 'post_locally', 'post', 'check'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.prepare = prepare
+        mock_world.post_locally = post_locally
+        mock_world.post = post
+        mock_world.check = check
+
+        mock_result = Mock()
+
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(mock_result)
+
+        # Every example that gets to the batch step has prepared before it's
+        # called, and c, which failed to prepare, isn't part of it.
+        self.assertEqual(events, [
+            ('prepare', 'a'),
+            ('post locally', 'a'),
+            ('check', 'a'),
+            ('prepare', 'b'),
+            ('prepare', 'c'),
+            ('prepare', 'd'),
+            ('post', ['b', 'd']),
+            ('check', 'd'),
+        ])
+        self.assertEqual(
+            [name for name, args, kwargs in mock_result.method_calls],
+            ['startTest', 'addSuccess', 'stopTest',
+             'startTest', 'addFailure', 'stopTest',
+             'startTest', 'addFailure', 'stopTest',
+             'startTest', 'addSuccess', 'stopTest'],
+        )
+        failures = [
+            args[1] for name, args, kwargs in mock_result.method_calls
+            if name == 'addFailure'
+        ]
+        self.assertEqual(
+            [exc_info.failed_step.strip() for exc_info in failures],
+            ['When I post b to /y', 'Given I prepare c'],
+        )
+
+
+class TestOutlineTemplate(TestCase):
+    def test_render(self):
+        from planterbox.feature import OutlineTemplate
+
+        template = OutlineTemplate([
+            '        Given I squiggly-add {<x>} and {<y>}',
+            '        Then the result should be <z>',
+            '        And nothing changes',
+        ])
+        self.assertEqual(template.placeholders, [['x', 'y'], ['z'], []])
+        self.assertEqual(
+            template.render({'x': '1', 'y': '<y>', 'z': 2}),
+            ['        Given I squiggly-add {1} and {<y>}',
+             '        Then the result should be 2',
+             '        And nothing changes'],
+        )
+
+    def test_missing_placeholder(self):
+        from planterbox.exceptions import UnmatchedSubstitutionException
+        from planterbox.feature import OutlineTemplate
+
+        template = OutlineTemplate(['When I reference an <undefined> example'])
+        with self.assertRaises(UnmatchedSubstitutionException) as context:
+            template.check(['x', 'y'])
+        self.assertEqual(context.exception.step, 'undefined')
+        self.assertEqual(
+            text_type(context.exception),
+            '"undefined" missing from outline examples x | y',
+        )
+
+        with self.assertRaises(UnmatchedSubstitutionException) as context:
+            template.missing({'x': '1'})
+        self.assertEqual(
+            text_type(context.exception),
+            '"undefined" missing from outline example {\'x\': \'1\'}',
+        )
+
+    def test_check_columns(self):
+        from planterbox.feature import OutlineTemplate
+
+        template = OutlineTemplate(['Given <b> and <a>', 'Then nothing'])
+        self.assertEqual(template.check(['a', 'b', 'c']), 2)
+        self.assertEqual(template.check(['b', 'c', 'a']), 3)
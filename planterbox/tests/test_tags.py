@@ -0,0 +1,60 @@
+import unittest
+
+from planterbox.exceptions import (
+    TagExpressionException,
+)
+from planterbox.tags import (
+    compile_tag_expression,
+    compile_tags,
+)
+
+
+class TestTagExpression(unittest.TestCase):
+    def assertMatches(self, text, cases):
+        expression = compile_tag_expression(text)
+        for tags, expected in cases:
+            self.assertEqual(
+                expression.matches(frozenset(tags)), expected,
+                '{!r} with {}'.format(text, sorted(tags)),
+            )
+
+    def test_comma_list(self):
+        self.assertMatches('abc,def', [
+            ({'abc'}, True), ({'def'}, True), ({'ghi'}, False), ((), False),
+        ])
+
+    def test_boolean(self):
+        self.assertMatches('a and not slow', [
+            ({'a'}, True), ({'a', 'slow'}, False), ({'slow'}, False),
+        ])
+        self.assertMatches('(@a or b) and not (c and d)', [
+            ({'a'}, True), ({'b', 'c'}, True), ({'b', 'c', 'd'}, False),
+            ({'c'}, False),
+        ])
+
+    def test_precedence(self):
+        self.assertMatches('a or b and c', [
+            ({'a'}, True), ({'b'}, False), ({'b', 'c'}, True),
+        ])
+        self.assertMatches('not a or b', [
+            ((), True), ({'a'}, False), ({'a', 'b'}, True),
+        ])
+
+    def test_tags(self):
+        self.assertEqual(
+            compile_tag_expression('(@a or b) and not c').tags,
+            frozenset(['a', 'b', 'c']),
+        )
+
+    def test_invalid(self):
+        for text in ['', 'a and', '(a', 'a)', 'a b', 'not', 'and a']:
+            with self.assertRaises(TagExpressionException):
+                compile_tag_expression(text)
+
+    def test_compile_tags(self):
+        self.assertIsNone(compile_tags([]))
+        expression = compile_tags(['a,b', 'not c'])
+        self.assertIs(compile_tags(['a,b', 'not c']), expression)
+        self.assertTrue(expression.matches({'a'}))
+        self.assertFalse(expression.matches({'a', 'c'}))
+        self.assertFalse(expression.matches({'d'}))
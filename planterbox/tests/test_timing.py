@@ -0,0 +1,129 @@
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from planterbox import timing
+from planterbox.timing import (
+    Timings,
+)
+
+
+class TestTimings(TestCase):
+    def test_slowest(self):
+        timings = Timings()
+        timings.add('step', 'fast', 0.1)
+        timings.add('step', 'slow', 0.5)
+        timings.add('step', 'fast', 0.2)
+        timings.add('hook', 'slow', 3.0)
+
+        slowest = timings.slowest('step')
+        self.assertEqual([record[0] for record in slowest], ['slow', 'fast'])
+        label, count, total, longest = slowest[1]
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(total, 0.3)
+        self.assertEqual(longest, 0.2)
+        self.assertEqual(len(timings.slowest('step', 1)), 1)
+
+    def test_drain_and_update(self):
+        worker = Timings()
+        worker.add('step', 'step', 1.0)
+        records = worker.drain()
+        self.assertFalse(worker)
+
+        main = Timings()
+        main.add('step', 'step', 2.0)
+        main.update(records)
+        self.assertEqual(main.slowest('step'), [('step', 2, 3.0, 2.0)])
+
+    def test_feature_timed(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import hook, step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I test a thing
+                Then I test a thing
+        """
+
+        @step(r'I test a thing')
+        def test_thing(test):
+            pass
+
+        @hook('before', 'scenario')
+        def before_scenario(test):
+            pass
+
+        mock_world = Mock(
+            spec=['test_thing', 'before_scenario'],
+            return_value=None,
+        )
+        mock_world.__name__ = 'mock'
+        mock_world.test_thing = test_thing
+        mock_world.before_scenario = before_scenario
+
+        timings = Timings()
+        timing.enable()
+        self.addCleanup(timing.disable)
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)), \
+                patch('planterbox.timing.timings', timings):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(Mock())
+
+        self.assertEqual(
+            [(label, count) for label, count, total, longest
+             in timings.slowest('step')],
+            [(__name__ + '.test_thing', 2)],
+        )
+        self.assertEqual(
+            [(label, count) for label, count, total, longest
+             in timings.slowest('hook')],
+            [(__name__ + '.before_scenario (before scenario)', 1)],
+        )
+        self.assertEqual(
+            [(label, count) for label, count, total, longest
+             in timings.slowest('scenario')],
+            [('A Test Scenario (mock:foobar.feature:0)', 1)],
+        )
+
+    def test_failing_step_timed(self):
+        from planterbox.feature import FeatureTestCase
+        from planterbox import step
+
+        test_feature = """Feature: A Test Feature
+            Scenario: A Test Scenario
+                When I fail
+        """
+
+        @step(r'I fail')
+        def fail(test):
+            raise AssertionError('failed')
+
+        mock_world = Mock(spec=['fail'], return_value=None)
+        mock_world.__name__ = 'mock'
+        mock_world.fail = fail
+
+        timings = Timings()
+        timing.enable()
+        self.addCleanup(timing.disable)
+        result = Mock()
+        with patch('planterbox.feature.import_module',
+                   Mock(return_value=mock_world)), \
+                patch('planterbox.timing.timings', timings):
+            test_case = FeatureTestCase(
+                feature_path='foobar.feature',
+                feature_text=test_feature,
+            )
+            test_case.__module__ = 'mock'
+            test_case.run(result)
+
+        self.assertEqual(result.addFailure.call_count, 1)
+        self.assertEqual(
+            [(label, count) for label, count, total, longest
+             in timings.slowest('step')],
+            [(__name__ + '.fail', 1)],
+        )
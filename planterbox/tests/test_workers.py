@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from planterbox import timing
+from planterbox.plugin import (
+    Planterbox,
+)
+from planterbox.timing import (
+    Timings,
+)
+from planterbox.workers import (
+    claim_worker_id,
+    worker_id,
+)
+
+calls = []
+
+
+def record_setup(worker_id):
+    calls.append(('setup', worker_id))
+
+
+def record_teardown(worker_id):
+    calls.append(('teardown', worker_id))
+
+
+def fail(worker_id):
+    raise RuntimeError('failed')
+
+
+class TestWorkers(unittest.TestCase):
+    def setUp(self):
+        plugin_patcher = mock.patch.multiple(
+            'planterbox.plugin.Planterbox',
+            # Short-circuit nose2 attempting to register this instance
+            addOption=mock.DEFAULT,
+            addFlag=mock.DEFAULT,
+        )
+        plugin_patcher.start()
+        self.addCleanup(plugin_patcher.stop)
+        self.pp = Planterbox()
+        self.pp.workerSetup = [
+            __name__ + '.record_setup', __name__ + '.fail',
+        ]
+        self.pp.workerTeardown = [__name__ + '.record_teardown']
+        del calls[:]
+
+        log_patcher = mock.patch('planterbox.workers.log')
+        self.log = log_patcher.start()
+        self.addCleanup(log_patcher.stop)
+
+    def test_claim_worker_id(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.assertEqual(
+            [claim_worker_id(directory) for _ in range(3)], [0, 1, 2],
+        )
+
+    def test_sole_worker(self):
+        with mock.patch.object(self.pp, 'uses_workers', return_value=False):
+            self.pp.startTestRun(mock.Mock())
+        self.assertEqual(worker_id(), 0)
+        self.pp.afterTestRun(mock.Mock())
+        self.assertIsNone(worker_id())
+        self.assertEqual(calls, [('setup', 0), ('teardown', 0)])
+        self.assertEqual(self.log.error.call_count, 1)
+
+    def test_subprocess(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        claim_worker_id(directory)
+        self.pp.workerDir = directory
+        self.pp.inSubprocess = True
+
+        self.pp.startSubprocess(mock.Mock())
+        self.assertEqual(worker_id(), 1)
+        self.pp.stopSubprocess(mock.Mock())
+        self.assertEqual(calls, [('setup', 1), ('teardown', 1)])
+
+    def test_subprocess_carries_last_timings(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        timing.enable()
+        self.addCleanup(timing.disable)
+        self.pp.workerDir = directory
+        self.pp.inSubprocess = True
+
+        worker_timings = Timings()
+        with mock.patch('planterbox.timing.timings', worker_timings):
+            self.pp.startSubprocess(mock.Mock())
+            worker_timings.add('hook', 'after feature', 1.5)
+            self.pp.stopSubprocess(mock.Mock())
+        self.assertFalse(worker_timings)
+
+        main = Planterbox()
+        main.workerDir = directory
+        main_timings = Timings()
+        with mock.patch('planterbox.timing.timings', main_timings):
+            main.afterTestRun(mock.Mock())
+        self.assertEqual(
+            main_timings.slowest('hook'), [('after feature', 1, 1.5, 1.5)],
+        )
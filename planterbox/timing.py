@@ -0,0 +1,117 @@
+"""Timings of the steps, hooks and scenarios run by planterbox.
+
+Timing is off until enable() is called, which the plugin does for
+``--planterbox-timing`` or ``timing = True`` in the ``[planterbox]`` config
+section. While it's on, the duration of every step call, hook call and
+scenario is added to the process-wide ``timings``, totalled by what ran:
+
+- steps by step function,
+- hooks by hook function and the stage they ran for,
+- scenarios by scenario name and test id.
+
+For example, to find the five slowest steps after a run:
+
+.. code:: python
+
+    from planterbox import timing
+
+    for label, count, total, longest in timing.timings.slowest('step', 5):
+        ...
+"""
+
+import threading
+
+try:
+    from time import perf_counter as clock
+except ImportError:  # Python 2
+    from time import time as clock
+
+KINDS = ('step', 'hook', 'scenario')
+
+_enabled = False
+
+
+class Timings(object):
+    """Durations totalled by kind, one of KINDS, and label"""
+
+    def __init__(self):
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.totals)
+
+    __nonzero__ = __bool__
+
+    def add(self, kind, label, duration):
+        self.update([(kind, label, 1, duration, duration)])
+
+    def records(self):
+        """List (kind, label, count, total, longest) for everything timed"""
+        with self.lock:
+            return [
+                (kind, label, count, total, longest)
+                for (kind, label), (count, total, longest)
+                in self.totals.items()
+            ]
+
+    def update(self, records):
+        """Add in records from another Timings' records()"""
+        for kind, label, count, total, longest in records:
+            with self.lock:
+                totals = self.totals.get((kind, label))
+                if totals is None:
+                    self.totals[(kind, label)] = [count, total, longest]
+                else:
+                    totals[0] += count
+                    totals[1] += total
+                    totals[2] = max(totals[2], longest)
+
+    def drain(self):
+        """Remove and return all records"""
+        with self.lock:
+            records = [
+                (kind, label, count, total, longest)
+                for (kind, label), (count, total, longest)
+                in self.totals.items()
+            ]
+            self.totals = {}
+        return records
+
+    def slowest(self, kind, n=10):
+        """List (label, count, total, longest) of the n labels of a kind
+        with the longest total duration, longest first"""
+        return sorted(
+            (
+                (label, count, total, longest)
+                for record_kind, label, count, total, longest in self.records()
+                if record_kind == kind
+            ),
+            key=lambda record: (-record[2], record[0]),
+        )[:n]
+
+
+timings = Timings()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def active():
+    """Return timings if timing is enabled, otherwise None"""
+    return timings if _enabled else None
+
+
+def function_label(fn):
+    """Name a step or hook function for reports"""
+    return '{}.{}'.format(
+        getattr(fn, '__module__', None) or '?',
+        getattr(fn, '__name__', None) or repr(fn),
+    )
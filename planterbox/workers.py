@@ -0,0 +1,99 @@
+"""Per-worker setup and teardown, and worker ids, for ``nose2.plugins.mp``.
+
+Every worker process of ``nose2.plugins.mp`` claims an id, from 0 up to one
+less than the number of workers, so it can use its own shard of a resource:
+a database, a port range, a scratch directory. ``worker_id()`` returns it, as
+does ``test.worker_id`` in steps, hooks and fixtures. A run without workers
+has the single worker id 0.
+
+Callables named in the ``worker-setup`` and ``worker-teardown`` options of
+the ``[planterbox]`` config section are called with the worker id once in
+each worker, before it runs its first test and after it runs its last. Their
+results last as long as the worker, across every feature it runs, and so do
+session fixtures, which are torn down when the worker stops.
+
+Timings and durations are carried to the main process after each test, but
+those of the after-feature hooks a worker runs as it stops come too late for
+that. The worker writes them to a file in the directory it claimed its id
+from, and the main process reads them in once the workers have exited.
+"""
+
+import errno
+import json
+import logging
+import os
+
+from nose2.util import (
+    object_from_name,
+)
+
+log = logging.getLogger('planterbox')
+
+_worker_id = None
+
+
+def worker_id():
+    """The id of this worker, or None outside of a test run"""
+    return _worker_id
+
+
+def set_worker_id(value):
+    global _worker_id
+    _worker_id = value
+
+
+def claim_worker_id(directory):
+    """Claim the lowest worker id not yet claimed by another worker sharing
+    directory, by creating a file named after it"""
+    candidate = 0
+    while True:
+        try:
+            fd = os.open(
+                os.path.join(directory, 'worker-{}'.format(candidate)),
+                os.O_CREAT | os.O_EXCL | os.O_WRONLY,
+            )
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            candidate += 1
+            continue
+        os.close(fd)
+        return candidate
+
+
+def run_callbacks(names, kind):
+    """Import and call each callable named in names with the worker id,
+    logging any that fail"""
+    for name in names:
+        try:
+            callback = object_from_name(name)[1]
+            callback(_worker_id)
+        except Exception:
+            log.error('planterbox %s %s failed in worker %s', kind, name,
+                      _worker_id, exc_info=True)
+
+
+def save_records(directory, records):
+    """Write the timing records of this worker, by kind of record, for
+    load_records to read in the main process"""
+    path = os.path.join(directory, 'records-{}.json'.format(_worker_id))
+    try:
+        with open(path, 'w') as records_file:
+            json.dump(records, records_file)
+    except (IOError, OSError):
+        log.warning('Could not write worker %s timings to %s', _worker_id,
+                    path, exc_info=True)
+
+
+def load_records(directory):
+    """Yield the records written by each worker with save_records"""
+    for name in sorted(os.listdir(directory)):
+        if not name.startswith('records-'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as records_file:
+                yield json.load(records_file)
+        except (IOError, OSError, ValueError):
+            log.warning('Could not read worker timings from %s', path,
+                        exc_info=True)
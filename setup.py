@@ -1,4 +1,5 @@
 import os
+import re
 
 from setuptools import setup, find_packages
 
@@ -15,9 +16,12 @@ description = 'A plugin for nose2 implementing behavior-driven testing.'
 with open("README.rst", "r") as readme:
     long_description = readme.read()
 
+with open(os.path.join(here, "planterbox", "__init__.py"), "r") as init:
+    version = re.search(r"^__version__ = '(.+)'$", init.read(), re.M).group(1)
+
 
 setup(name='planterbox',
-      version='0.7.2',
+      version=version,
       description=description,
       long_description=long_description,
       license='MIT',